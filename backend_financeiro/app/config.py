@@ -10,6 +10,35 @@ class Settings(BaseSettings):
     
     cors_origins: List[str] = ["*"]
     
+    ml_cache_max_entradas: int = 2048
+    analises_fila_max: int = 10000
+    analises_lote_max: int = 500
+    analises_retencao_dias: int = 365
+    analises_compactar_apos_dias: int = 7
+    analises_lote_manutencao: int = 5000
+    importacao_max_erros: int = 100
+    transacoes_lote_max: int = 1000
+    paginacao_limite_max: int = 1000
+    contas_cache_max_entradas: int = 10000
+    contas_cache_ttl_segundos: int = 60
+    exportacao_linhas_por_lote: int = 5000
+    auth_cache_max_entradas: int = 10000
+    auth_cache_ttl_segundos: int = 60
+    bcrypt_rounds: int = 12
+    hash_processos: int = 2
+    hash_fila_max: int = 32
+    categorias_cache_max_entradas: int = 10000
+    categorias_cache_ttl_segundos: int = 300
+    etag_epoca: str = "1"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 300
+    db_pool_pre_ping: bool = True
+    db_pool_use_lifo: bool = False
+    db_statement_timeout_ms: int = 0
+    metricas_token: str = ""
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
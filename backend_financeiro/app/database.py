@@ -4,15 +4,28 @@ from sqlalchemy.orm import sessionmaker, Session
 from typing import Generator
 
 from .config import settings
+from .utils.telemetria_pool import PoolMedido, telemetria_pool
 
 SQLALCHEMY_DATABASE_URL = settings.database_url
 print(f'?? DATABASE_URL: {SQLALCHEMY_DATABASE_URL}')
 
+# statement_timeout vale para toda sessão aberta pelo pool; 0 desativa o limite
+connect_args = {}
+if settings.db_statement_timeout_ms:
+    connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,
+    poolclass=PoolMedido,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_use_lifo=settings.db_pool_use_lifo,
+    connect_args=connect_args,
 )
+telemetria_pool.instalar(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -3,7 +3,49 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple
 from sqlalchemy.orm import Session
-from ..models.models import Transacao, Categoria
+from .historico_colunar import carregar_transacoes_colunar
+from .resumo_mensal import carregar_resumo_mensal
+
+METODOS_ANOMALIA = ('zscore', 'mad', 'iqr')
+
+
+def marcar_anomalias(despesas: pd.DataFrame, metodo: str = 'zscore', minimo_por_categoria: int = 5) -> pd.DataFrame:
+    """Seleciona as despesas anômalas (acima do limite da própria categoria) com uma única máscara.
+    
+    As estatísticas por categoria são calculadas com groupby().transform, sem laço por categoria:
+    - zscore: valor > média + 2 desvios padrão
+    - mad: z robusto 0.6745 * (valor - mediana) / MAD > 3.5
+    - iqr: valor > Q3 + 1.5 * IQR
+    Categorias com menos de minimo_por_categoria transações ou dispersão zero são ignoradas.
+    """
+    if metodo not in METODOS_ANOMALIA:
+        raise ValueError(f"Método de detecção inválido: {metodo}. Use um de {METODOS_ANOMALIA}")
+    
+    grupos = despesas.groupby('categoria_id', observed=True)['valor']
+    quantidade = grupos.transform('count')
+    media = grupos.transform('mean')
+    
+    if metodo == 'zscore':
+        dispersao = grupos.transform('std')
+        limite = media + 2 * dispersao
+    elif metodo == 'mad':
+        mediana = grupos.transform('median')
+        desvio_absoluto = (despesas['valor'] - mediana).abs()
+        dispersao = desvio_absoluto.groupby(despesas['categoria_id'], observed=True).transform('median')
+        limite = mediana + 3.5 * dispersao / 0.6745
+    else:
+        q1 = grupos.transform('quantile', 0.25)
+        q3 = grupos.transform('quantile', 0.75)
+        dispersao = q3 - q1
+        limite = q3 + 1.5 * dispersao
+    
+    mascara = (quantidade >= minimo_por_categoria) & (dispersao > 0) & (despesas['valor'] > limite)
+    
+    anomalas = despesas[mascara].copy()
+    anomalas['media_categoria'] = media[mascara]
+    
+    return anomalas
+
 
 class AnalisePadroes:
     def __init__(self, db: Session, usuario_id: int):
@@ -11,33 +53,10 @@ class AnalisePadroes:
         self.usuario_id = usuario_id
     
     def obter_transacoes_periodo(self, data_inicio: datetime, data_fim: datetime) -> pd.DataFrame:
-        transacoes = self.db.query(Transacao).filter(
-            Transacao.usuario_id == self.usuario_id,
-            Transacao.data_transacao >= data_inicio,
-            Transacao.data_transacao <= data_fim,
-            Transacao.efetivada == True
-        ).all()
-        
-        if not transacoes:
-            return pd.DataFrame()
-        
-        data = []
-        for t in transacoes:
-            data.append({
-                'id': t.id,
-                'tipo': t.tipo,
-                'valor': float(t.valor),
-                'data': t.data_transacao,
-                'categoria_id': t.categoria_id,
-                'descricao': t.descricao,
-                'dia_semana': t.data_transacao.weekday(),
-                'dia_mes': t.data_transacao.day,
-                'mes': t.data_transacao.month,
-                'ano': t.data_transacao.year
-            })
-        
-        df = pd.DataFrame(data)
-        return df
+        return carregar_transacoes_colunar(
+            self.db, self.usuario_id, data_inicio, data_fim,
+            incluir_id=True, incluir_descricao=True, incluir_nome_categoria=True
+        )
     
     def analisar_gastos_por_categoria(self, periodo_dias: int = 30) -> Dict:
         data_fim = datetime.now().date()
@@ -56,14 +75,13 @@ class AnalisePadroes:
         despesas = df[df['tipo'] == 'despesa']
         receitas = df[df['tipo'] == 'receita']
         
-        gastos_categoria = despesas.groupby('categoria_id').agg({
+        gastos_categoria = despesas.groupby(['categoria_id', 'categoria_nome'], observed=True).agg({
             'valor': ['sum', 'mean', 'count']
         }).reset_index()
         
         categorias_info = []
         for _, row in gastos_categoria.iterrows():
             categoria_id = int(row['categoria_id'])
-            categoria = self.db.query(Categoria).filter(Categoria.id == categoria_id).first()
             
             total = float(row[('valor', 'sum')])
             media = float(row[('valor', 'mean')])
@@ -73,7 +91,7 @@ class AnalisePadroes:
             
             categorias_info.append({
                 'categoria_id': categoria_id,
-                'categoria_nome': categoria.nome if categoria else 'Desconhecida',
+                'categoria_nome': row[('categoria_nome', '')],
                 'total': round(total, 2),
                 'media': round(media, 2),
                 'quantidade': quantidade,
@@ -89,7 +107,7 @@ class AnalisePadroes:
             'total_receitas': round(float(receitas['valor'].sum()), 2) if not receitas.empty else 0
         }
     
-    def detectar_anomalias(self, periodo_dias: int = 90) -> Dict:
+    def detectar_anomalias(self, periodo_dias: int = 90, metodo: str = 'zscore') -> Dict:
         data_fim = datetime.now().date()
         data_inicio = data_fim - timedelta(days=periodo_dias)
         
@@ -103,43 +121,37 @@ class AnalisePadroes:
             }
         
         despesas = df[df['tipo'] == 'despesa']
-        
-        anomalias = []
-        
-        for categoria_id in despesas['categoria_id'].unique():
-            cat_data = despesas[despesas['categoria_id'] == categoria_id]
-            
-            if len(cat_data) < 5:
-                continue
-            
-            media = cat_data['valor'].mean()
-            desvio = cat_data['valor'].std()
-            
-            if desvio == 0:
-                continue
-            
-            limite_superior = media + (2 * desvio)
-            
-            anomalias_cat = cat_data[cat_data['valor'] > limite_superior]
-            
-            for _, row in anomalias_cat.iterrows():
-                categoria = self.db.query(Categoria).filter(Categoria.id == categoria_id).first()
-                
-                anomalias.append({
-                    'transacao_id': int(row['id']),
-                    'data': str(row['data']),
-                    'valor': round(float(row['valor']), 2),
-                    'categoria': categoria.nome if categoria else 'Desconhecida',
-                    'media_categoria': round(float(media), 2),
-                    'desvio_percentual': round(((row['valor'] - media) / media * 100), 2),
-                    'descricao': row['descricao']
-                })
+        anomalas = marcar_anomalias(despesas, metodo)
+        
+        desvio_percentual = ((anomalas['valor'] - anomalas['media_categoria']) / anomalas['media_categoria'] * 100).round(2)
+        
+        anomalias = [
+            {
+                'transacao_id': int(transacao_id),
+                'data': str(data),
+                'valor': round(float(valor), 2),
+                'categoria': str(categoria),
+                'media_categoria': round(float(media), 2),
+                'desvio_percentual': float(desvio),
+                'descricao': descricao
+            }
+            for transacao_id, data, valor, categoria, media, desvio, descricao in zip(
+                anomalas['id'],
+                anomalas['data'].dt.date,
+                anomalas['valor'],
+                anomalas['categoria_nome'],
+                anomalas['media_categoria'],
+                desvio_percentual,
+                anomalas['descricao']
+            )
+        ]
         
         anomalias.sort(key=lambda x: x['desvio_percentual'], reverse=True)
         
         return {
             'anomalias_detectadas': anomalias,
             'total_anomalias': len(anomalias),
+            'metodo': metodo,
             'periodo_analise': {'inicio': str(data_inicio), 'fim': str(data_fim)}
         }
     
@@ -147,7 +159,7 @@ class AnalisePadroes:
         data_fim = datetime.now().date()
         data_inicio = data_fim - timedelta(days=periodo_meses * 30)
         
-        df = self.obter_transacoes_periodo(data_inicio, data_fim)
+        df = carregar_resumo_mensal(self.db, self.usuario_id, data_inicio, data_fim)
         
         if df.empty:
             return {
@@ -155,8 +167,6 @@ class AnalisePadroes:
                 'mensagem': 'Sem dados para análise de tendências'
             }
         
-        df['ano_mes'] = df['ano'].astype(str) + '-' + df['mes'].astype(str).str.zfill(2)
-        
         tendencias_mensal = df.groupby(['ano_mes', 'tipo']).agg({
             'valor': 'sum'
         }).reset_index()
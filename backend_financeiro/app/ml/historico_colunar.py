@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import List, Sequence
+from sqlalchemy import select, cast, case, BigInteger, Integer
+from sqlalchemy.orm import Session
+from ..models.models import Transacao, Categoria
+
+TIPOS = ['receita', 'despesa', 'transferencia']
+
+_EPOCA = date(1970, 1, 1)
+
+
+def carregar_transacoes_colunar(db: Session, usuario_id: int, data_inicio: date, data_fim: date,
+                                incluir_id: bool = False, incluir_descricao: bool = False,
+                                incluir_nome_categoria: bool = False) -> pd.DataFrame:
+    """Carrega as transações efetivadas do período em colunas NumPy tipadas.
+    
+    Seleciona só as colunas necessárias via SQLAlchemy Core, sem hidratar objetos ORM:
+    valor em centavos (int64), data em dias desde 1970 e tipo como código inteiro.
+    Com incluir_nome_categoria o nome vem da mesma consulta, por LEFT JOIN.
+    """
+    t = Transacao.__table__
+    c = Categoria.__table__
+    colunas = [
+        cast(t.c.data_transacao - _EPOCA, Integer).label('dias'),
+        cast(t.c.valor * 100, BigInteger).label('valor_centavos'),
+        case(*[(t.c.tipo == tipo, codigo) for codigo, tipo in enumerate(TIPOS)]).label('tipo'),
+        t.c.categoria_id
+    ]
+    if incluir_id:
+        colunas.append(t.c.id)
+    if incluir_descricao:
+        colunas.append(t.c.descricao)
+    if incluir_nome_categoria:
+        colunas.append(c.c.nome)
+    
+    origem = t.outerjoin(c, c.c.id == t.c.categoria_id) if incluir_nome_categoria else t
+    
+    instrucao = select(*colunas).select_from(origem).where(
+        t.c.usuario_id == usuario_id,
+        t.c.data_transacao >= data_inicio,
+        t.c.data_transacao <= data_fim,
+        t.c.efetivada == True
+    )
+    
+    linhas = db.execute(instrucao).all()
+    return montar_frame(linhas, incluir_id, incluir_descricao, incluir_nome_categoria)
+
+
+def montar_frame(linhas: Sequence[tuple], incluir_id: bool = False, incluir_descricao: bool = False,
+                 incluir_nome_categoria: bool = False) -> pd.DataFrame:
+    """Monta o DataFrame a partir de tuplas (dias, centavos, código do tipo, categoria_id[, id][, descricao][, nome])"""
+    if not linhas:
+        return pd.DataFrame()
+    
+    n = len(linhas)
+    colunas: List[tuple] = list(zip(*linhas))
+    
+    dias = np.fromiter(colunas[0], dtype=np.int64, count=n)
+    centavos = np.fromiter(colunas[1], dtype=np.int64, count=n)
+    codigos_tipo = np.fromiter(colunas[2], dtype=np.int8, count=n)
+    categorias = np.fromiter(colunas[3], dtype=np.int32, count=n)
+    
+    datas = dias.astype('datetime64[D]')
+    meses = datas.astype('datetime64[M]')
+    indice_mes = meses.astype(np.int64)
+    
+    meses_unicos, inverso = np.unique(meses, return_inverse=True)
+    
+    extras = iter(colunas[4:])
+    
+    frame = {}
+    if incluir_id:
+        frame['id'] = np.fromiter(next(extras), dtype=np.int64, count=n)
+    frame['tipo'] = pd.Categorical.from_codes(codigos_tipo, categories=TIPOS)
+    frame['valor_centavos'] = centavos
+    frame['valor'] = centavos / 100.0
+    frame['data'] = datas
+    frame['categoria_id'] = pd.Categorical(categorias)
+    if incluir_descricao:
+        frame['descricao'] = np.array(next(extras), dtype=object)
+    if incluir_nome_categoria:
+        frame['categoria_nome'] = pd.Categorical(
+            [nome if nome is not None else 'Desconhecida' for nome in next(extras)]
+        )
+    frame['dia_semana'] = ((dias + 3) % 7).astype(np.int8)
+    frame['dia_mes'] = ((datas - meses).astype(np.int64) + 1).astype(np.int8)
+    frame['mes'] = (indice_mes % 12 + 1).astype(np.int8)
+    frame['ano'] = (indice_mes // 12 + 1970).astype(np.int16)
+    frame['ano_mes'] = pd.Categorical.from_codes(
+        inverso.astype(np.int32),
+        categories=np.datetime_as_string(meses_unicos, unit='M')
+    )
+    
+    return pd.DataFrame(frame)
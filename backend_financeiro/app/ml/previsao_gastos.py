@@ -1,50 +1,57 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from typing import Dict, List
+from dataclasses import dataclass
+from datetime import datetime, timedelta, date
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
-from sklearn.linear_model import LinearRegression
-from ..models.models import Transacao
+from .resumo_mensal import carregar_resumo_mensal
+from .tendencia import empacotar_series, prever_proximo_ponto
+
+@dataclass(frozen=True)
+class HistoricoUsuario:
+    """Histórico mensal do usuário carregado uma vez e compartilhado, somente leitura, pelas análises"""
+    usuario_id: int
+    data_inicio: date
+    data_fim: date
+    resumo_mensal: pd.DataFrame
+    
+    @classmethod
+    def carregar(cls, db: Session, usuario_id: int, meses: int = 12) -> 'HistoricoUsuario':
+        data_fim = datetime.now().date()
+        data_inicio = data_fim - timedelta(days=meses * 30)
+        return cls(
+            usuario_id=usuario_id,
+            data_inicio=data_inicio,
+            data_fim=data_fim,
+            resumo_mensal=carregar_resumo_mensal(db, usuario_id, data_inicio, data_fim)
+        )
+
 
 class PrevisaoGastos:
-    def __init__(self, db: Session, usuario_id: int):
+    def __init__(self, db: Session, usuario_id: int, historico: Optional[HistoricoUsuario] = None):
         self.db = db
         self.usuario_id = usuario_id
+        self._historico = historico
+    
+    @property
+    def historico(self) -> HistoricoUsuario:
+        if self._historico is None:
+            self._historico = HistoricoUsuario.carregar(self.db, self.usuario_id, 12)
+        return self._historico
     
-    def obter_historico_mensal(self, meses: int = 12) -> pd.DataFrame:
+    def obter_resumo_mensal(self, meses: int = 12) -> pd.DataFrame:
+        if meses == 12:
+            return self.historico.resumo_mensal
+        
         data_fim = datetime.now().date()
         data_inicio = data_fim - timedelta(days=meses * 30)
         
-        transacoes = self.db.query(Transacao).filter(
-            Transacao.usuario_id == self.usuario_id,
-            Transacao.data_transacao >= data_inicio,
-            Transacao.data_transacao <= data_fim,
-            Transacao.efetivada == True
-        ).all()
-        
-        if not transacoes:
-            return pd.DataFrame()
-        
-        data = []
-        for t in transacoes:
-            data.append({
-                'tipo': t.tipo,
-                'valor': float(t.valor),
-                'data': t.data_transacao,
-                'mes': t.data_transacao.month,
-                'ano': t.data_transacao.year,
-                'categoria_id': t.categoria_id
-            })
-        
-        df = pd.DataFrame(data)
-        df['ano_mes'] = df['ano'].astype(str) + '-' + df['mes'].astype(str).str.zfill(2)
-        
-        return df
+        return carregar_resumo_mensal(self.db, self.usuario_id, data_inicio, data_fim)
     
     def prever_gastos_proximo_mes(self) -> Dict:
-        df = self.obter_historico_mensal(12)
+        df = self.obter_resumo_mensal(12)
         
-        if df.empty or len(df) < 30:
+        if df.empty or df['quantidade'].sum() < 30:
             return {
                 'previsao_total': 0,
                 'confianca': 0,
@@ -77,23 +84,12 @@ class PrevisaoGastos:
                 }
             }
         
-        X = np.array(range(len(mensal))).reshape(-1, 1)
-        y = mensal['valor'].values
-        
-        modelo = LinearRegression()
-        modelo.fit(X, y)
+        valores, mascara = empacotar_series([mensal['valor'].values])
+        resultado = prever_proximo_ponto(valores, mascara)
         
-        proximo_mes = len(mensal)
-        previsao = modelo.predict([[proximo_mes]])[0]
-        
-        score = modelo.score(X, y)
-        confianca = int(score * 100)
-        
-        ultimos_3_meses = mensal.tail(3)['valor'].mean()
-        
-        if abs(previsao - ultimos_3_meses) / ultimos_3_meses > 0.5:
-            previsao = ultimos_3_meses
-            confianca = max(confianca - 20, 30)
+        previsao = resultado['previsao'][0]
+        confianca = int(resultado['confianca'][0])
+        inclinacao = resultado['inclinacao'][0]
         
         return {
             'previsao_total': round(float(previsao), 2),
@@ -102,13 +98,13 @@ class PrevisaoGastos:
             'detalhes': {
                 'metodo': 'regressao_linear',
                 'meses_analisados': len(mensal),
-                'tendencia': 'crescente' if modelo.coef_[0] > 0 else 'decrescente',
-                'variacao_mensal': round(float(modelo.coef_[0]), 2)
+                'tendencia': 'crescente' if inclinacao > 0 else 'decrescente',
+                'variacao_mensal': round(float(inclinacao), 2)
             }
         }
     
     def prever_por_categoria(self, categoria_id: int, meses_futuro: int = 1) -> Dict:
-        df = self.obter_historico_mensal(12)
+        df = self.obter_resumo_mensal(12)
         
         if df.empty:
             return {
@@ -128,19 +124,44 @@ class PrevisaoGastos:
                 'mensagem': 'Sem histórico para esta categoria'
             }
         
-        mensal = cat_data.groupby('ano_mes')['valor'].sum().reset_index()
+        mensal = cat_data.groupby('ano_mes')['valor'].sum()
+        
+        return self._montar_previsao_categoria(
+            categoria_id, mensal.mean(), mensal.std(), len(mensal)
+        )
+    
+    def prever_todas_categorias(self) -> List[Dict]:
+        """Previsão de todas as categorias de despesa em uma única passada de groupby"""
+        df = self.obter_resumo_mensal(12)
+        
+        if df.empty:
+            return []
         
-        if len(mensal) < 2:
+        despesas = df[df['tipo'] == 'despesa']
+        
+        if despesas.empty:
+            return []
+        
+        mensal = despesas.groupby(['categoria_id', 'ano_mes'])['valor'].sum()
+        estatisticas = mensal.groupby(level='categoria_id').agg(['mean', 'std', 'count'])
+        
+        previsoes = [
+            self._montar_previsao_categoria(int(categoria_id), row['mean'], row['std'], int(row['count']))
+            for categoria_id, row in estatisticas.iterrows()
+        ]
+        previsoes.sort(key=lambda x: x['previsao'], reverse=True)
+        
+        return previsoes
+    
+    def _montar_previsao_categoria(self, categoria_id: int, media: float, desvio: float, meses: int) -> Dict:
+        if meses < 2:
             return {
                 'categoria_id': categoria_id,
-                'previsao': round(float(mensal['valor'].iloc[0]), 2),
+                'previsao': round(float(media), 2),
                 'confianca': 40,
                 'mensagem': 'Previsão baseada em único mês'
             }
         
-        media = mensal['valor'].mean()
-        desvio = mensal['valor'].std()
-        
         confianca = 70 if desvio / media < 0.3 else 50 if desvio / media < 0.5 else 30
         
         return {
@@ -151,12 +172,12 @@ class PrevisaoGastos:
             'detalhes': {
                 'media': round(float(media), 2),
                 'desvio_padrao': round(float(desvio), 2),
-                'meses_analisados': len(mensal)
+                'meses_analisados': meses
             }
         }
     
     def analisar_sazonalidade(self) -> Dict:
-        df = self.obter_historico_mensal(12)
+        df = self.obter_resumo_mensal(12)
         
         if df.empty:
             return {
@@ -172,7 +193,11 @@ class PrevisaoGastos:
                 'mensagem': 'Sem histórico de despesas'
             }
         
-        por_mes = despesas.groupby('mes')['valor'].agg(['mean', 'count']).reset_index()
+        por_mes = despesas.groupby('mes').agg(
+            soma=('valor', 'sum'),
+            count=('quantidade', 'sum')
+        ).reset_index()
+        por_mes['mean'] = por_mes['soma'] / por_mes['count']
         
         if len(por_mes) < 3:
             return {
@@ -213,8 +238,9 @@ class PrevisaoGastos:
             'media_geral': round(float(media_geral), 2)
         }
     
-    def calcular_orcamento_sugerido(self) -> Dict:
-        previsao = self.prever_gastos_proximo_mes()
+    def calcular_orcamento_sugerido(self, previsao: Optional[Dict] = None) -> Dict:
+        if previsao is None:
+            previsao = self.prever_gastos_proximo_mes()
         
         if previsao['previsao_total'] == 0:
             return {
@@ -235,4 +261,18 @@ class PrevisaoGastos:
                 'para cobrir imprevistos.'
             )
         }
-
+    
+    def gerar_relatorio_completo(self) -> Dict:
+        """Calcula todas as análises de previsão sobre um único carregamento do histórico"""
+        previsao = self.prever_gastos_proximo_mes()
+        
+        return {
+            'previsao_proximo_mes': previsao,
+            'por_categoria': self.prever_todas_categorias(),
+            'sazonalidade': self.analisar_sazonalidade(),
+            'orcamento_sugerido': self.calcular_orcamento_sugerido(previsao),
+            'periodo_analise': {
+                'inicio': str(self.historico.data_inicio),
+                'fim': str(self.historico.data_fim)
+            }
+        }
@@ -0,0 +1,40 @@
+import pandas as pd
+from datetime import date
+from sqlalchemy.orm import Session
+from ..models.models import ResumoMensalCategoria
+
+
+def carregar_resumo_mensal(db: Session, usuario_id: int, data_inicio: date, data_fim: date) -> pd.DataFrame:
+    """Carrega o agregado mensal por categoria e tipo entre os meses de data_inicio e data_fim.
+    
+    O custo depende de meses x categorias, não do número de transações.
+    """
+    chave_mes = ResumoMensalCategoria.ano * 100 + ResumoMensalCategoria.mes
+    
+    linhas = db.query(
+        ResumoMensalCategoria.ano,
+        ResumoMensalCategoria.mes,
+        ResumoMensalCategoria.categoria_id,
+        ResumoMensalCategoria.tipo,
+        ResumoMensalCategoria.soma,
+        ResumoMensalCategoria.quantidade,
+        ResumoMensalCategoria.soma_quadrados
+    ).filter(
+        ResumoMensalCategoria.usuario_id == usuario_id,
+        ResumoMensalCategoria.quantidade > 0,
+        chave_mes >= data_inicio.year * 100 + data_inicio.month,
+        chave_mes <= data_fim.year * 100 + data_fim.month
+    ).all()
+    
+    if not linhas:
+        return pd.DataFrame()
+    
+    df = pd.DataFrame(
+        linhas,
+        columns=['ano', 'mes', 'categoria_id', 'tipo', 'valor', 'quantidade', 'soma_quadrados']
+    )
+    df['valor'] = df['valor'].astype(float)
+    df['soma_quadrados'] = df['soma_quadrados'].astype(float)
+    df['ano_mes'] = df['ano'].astype(str) + '-' + df['mes'].astype(str).str.zfill(2)
+    
+    return df
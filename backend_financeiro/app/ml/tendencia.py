@@ -0,0 +1,85 @@
+import numpy as np
+from typing import Dict, Sequence, Tuple
+
+
+def empacotar_series(series: Sequence[Sequence[float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Empacota séries de tamanhos diferentes em uma matriz alinhada à esquerda com máscara de validade"""
+    tamanho = max((len(s) for s in series), default=0)
+    valores = np.zeros((len(series), tamanho), dtype=np.float64)
+    mascara = np.zeros((len(series), tamanho), dtype=bool)
+    for i, serie in enumerate(series):
+        valores[i, :len(serie)] = serie
+        mascara[i, :len(serie)] = True
+    return valores, mascara
+
+
+def ajustar_tendencias(valores: np.ndarray, mascara: np.ndarray) -> Dict[str, np.ndarray]:
+    """Ajusta uma reta por mínimos quadrados em cada linha de uma só vez, em forma fechada.
+    
+    Cada linha é uma série alinhada à esquerda (x = 0, 1, 2, ...) e a máscara marca os pontos
+    válidos. Retorna inclinação, intercepto, R² e quantidade de pontos por série; séries com
+    menos de dois pontos ficam com inclinação NaN.
+    """
+    m = mascara.astype(np.float64)
+    x = np.broadcast_to(np.arange(valores.shape[1], dtype=np.float64), valores.shape)
+    y = np.where(mascara, valores, 0.0)
+    
+    n = m.sum(axis=1)
+    soma_x = (x * m).sum(axis=1)
+    soma_y = y.sum(axis=1)
+    soma_xx = (x * x * m).sum(axis=1)
+    soma_xy = (x * y).sum(axis=1)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denominador = n * soma_xx - soma_x ** 2
+        inclinacao = np.where(denominador > 0, (n * soma_xy - soma_x * soma_y) / denominador, np.nan)
+        intercepto = (soma_y - inclinacao * soma_x) / n
+        
+        media_y = soma_y / n
+        ajustado = intercepto[:, None] + inclinacao[:, None] * x
+        ss_res = (((y - ajustado) ** 2) * m).sum(axis=1)
+        ss_tot = (((y - media_y[:, None]) ** 2) * m).sum(axis=1)
+        
+        # Mesma convenção do r2_score do scikit-learn para séries constantes
+        r2 = np.where(
+            ss_tot > 0,
+            1 - ss_res / ss_tot,
+            np.where(np.isclose(ss_res, 0), 1.0, 0.0)
+        )
+    
+    return {
+        'inclinacao': inclinacao,
+        'intercepto': intercepto,
+        'r2': r2,
+        'pontos': n.astype(np.int64)
+    }
+
+
+def prever_proximo_ponto(valores: np.ndarray, mascara: np.ndarray, limite_desvio: float = 0.5) -> Dict[str, np.ndarray]:
+    """Prevê o ponto seguinte de cada série e aplica a proteção contra a média dos últimos 3 pontos.
+    
+    Quando a previsão se afasta mais que limite_desvio (50%) da média dos últimos 3 meses, usa-se
+    essa média e a confiança cai 20 pontos (mínimo 30).
+    """
+    ajuste = ajustar_tendencias(valores, mascara)
+    n = ajuste['pontos']
+    
+    previsao = ajuste['intercepto'] + ajuste['inclinacao'] * n
+    confianca = np.trunc(ajuste['r2'] * 100)
+    
+    colunas = np.arange(valores.shape[1])
+    ultimos = mascara & (colunas[None, :] >= (n - 3)[:, None])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media_ultimos = np.where(ultimos, valores, 0.0).sum(axis=1) / ultimos.sum(axis=1)
+        fora_do_limite = np.abs(previsao - media_ultimos) / media_ultimos > limite_desvio
+    
+    previsao = np.where(fora_do_limite, media_ultimos, previsao)
+    confianca = np.where(fora_do_limite, np.maximum(confianca - 20, 30), confianca)
+    
+    return {
+        'previsao': previsao,
+        'confianca': confianca.astype(np.int64),
+        'inclinacao': ajuste['inclinacao'],
+        'r2': ajuste['r2'],
+        'pontos': n
+    }
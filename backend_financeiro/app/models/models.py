@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, Boolean, ForeignKey, Text, ARRAY, CheckConstraint
+from sqlalchemy import Column, Integer, BigInteger, String, Numeric, Date, DateTime, Boolean, ForeignKey, Text, ARRAY, CheckConstraint, PrimaryKeyConstraint, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -95,8 +95,35 @@ class Transacao(Base):
     __table_args__ = (
         CheckConstraint(tipo.in_(['receita', 'despesa', 'transferencia']), name='check_tipo_transacao'),
         CheckConstraint('valor > 0', name='check_valor_positivo'),
+        Index('idx_transacao_data_usuario', usuario_id, data_transacao.desc(), id.desc()),
     )
 
+class ResumoMensalCategoria(Base):
+    """Agregado mensal das transações efetivadas, mantido por trigger (database/005_resumo_mensal.sql)"""
+    __tablename__ = "resumo_mensal_categoria"
+    
+    usuario_id = Column(Integer, ForeignKey("usuario.id", ondelete="CASCADE"), nullable=False)
+    ano = Column(Integer, nullable=False)
+    mes = Column(Integer, nullable=False)
+    categoria_id = Column(Integer, ForeignKey("categorias.id", ondelete="CASCADE"), nullable=False)
+    tipo = Column(String(10), nullable=False)
+    soma = Column(Numeric(15, 2), nullable=False, default=0)
+    quantidade = Column(Integer, nullable=False, default=0)
+    soma_quadrados = Column(Numeric(30, 4), nullable=False, default=0)
+    
+    __table_args__ = (
+        PrimaryKeyConstraint('usuario_id', 'ano', 'mes', 'categoria_id', 'tipo', name='pk_resumo_mensal_categoria'),
+        CheckConstraint('mes BETWEEN 1 AND 12', name='check_mes_resumo'),
+    )
+
+class VersaoDadosUsuario(Base):
+    """Versão monotônica dos dados do usuário, incrementada a cada escrita que afeta as análises"""
+    __tablename__ = "versao_dados_usuario"
+    
+    usuario_id = Column(Integer, ForeignKey("usuario.id", ondelete="CASCADE"), primary_key=True)
+    versao = Column(BigInteger, nullable=False, default=0)
+    data_atualizacao = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class Meta(Base):
     __tablename__ = "meta"
     
@@ -169,9 +196,12 @@ class AnaliseConsumo(Base):
     insights = Column(ARRAY(Text), nullable=True)
     recomendacoes = Column(ARRAY(Text), nullable=True)
     score_confianca = Column(Numeric(5, 2), nullable=True)
+    assinatura = Column(String(40), nullable=True)
     data_criacao = Column(DateTime(timezone=True), server_default=func.now())
     
     __table_args__ = (
-        CheckConstraint(tipo_analise.in_(['padrao_consumo', 'previsao', 'anomalia', 'tendencia', 'comparativo']), name='check_tipo_analise'),
+        CheckConstraint(tipo_analise.in_(['padrao_consumo', 'previsao', 'anomalia', 'tendencia', 'comparativo', 'precomputo']), name='check_tipo_analise'),
         CheckConstraint('periodo_fim >= periodo_inicio', name='check_periodo_analise'),
+        Index('idx_analise_usuario_data', usuario_id, data_criacao.desc(), id.desc()),
+        Index('idx_analise_data_criacao', data_criacao),
     )
\ No newline at end of file
@@ -173,6 +173,47 @@ class Transacao(BaseModel):
         return float(valor)
 
 
+class PaginaTransacoes(BaseModel):
+    transacoes: List[Transacao]
+    next_cursor: Optional[str] = None
+
+
+class OperacaoTransacao(BaseModel):
+    operacao: str = Field(..., pattern="^(criar|atualizar|excluir)$")
+    id: Optional[int] = None
+    referencia: Optional[str] = None
+    transacao: Optional[TransacaoCreate] = None
+    alteracoes: Optional[TransacaoUpdate] = None
+
+
+class LoteTransacoes(BaseModel):
+    operacoes: List[OperacaoTransacao] = Field(..., min_length=1)
+
+
+class ResultadoOperacaoTransacao(BaseModel):
+    indice: int
+    referencia: Optional[str] = None
+    operacao: str
+    sucesso: bool
+    id: Optional[int] = None
+    erro: Optional[str] = None
+    transacao: Optional[Transacao] = None
+
+
+class ErroImportacao(BaseModel):
+    linha: int
+    erro: str
+
+
+class ResultadoImportacao(BaseModel):
+    importadas: int
+    linhas_lidas: int
+    total_erros: int
+    erros: List[ErroImportacao]
+    duracao_segundos: float
+    linhas_por_segundo: float
+
+
 class MetaBase(BaseModel):
     nome: str = Field(..., min_length=1, max_length=100)
     descricao: Optional[str] = None
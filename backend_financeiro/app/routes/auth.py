@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from dataclasses import astuple
 from datetime import timedelta
+from typing import Optional
 
 from ..database import get_db
 from ..models.models import Usuario
@@ -9,18 +12,27 @@ from ..models import schemas
 from ..services.auth import (
     authenticate_usuario,
     create_access_token,
-    get_password_hash,
-    get_current_usuario,
+    get_current_principal,
+    Principal,
     get_usuario_by_email,
 )
+from ..services.hashing import pool_hashing
+from ..utils.etag import etag_conteudo, etag_corresponde, nao_modificado
 from ..config import settings
 
 router = APIRouter()
 
 
+def _salvar_usuario(db: Session, usuario: Usuario) -> Usuario:
+    db.add(usuario)
+    db.commit()
+    db.refresh(usuario)
+    return usuario
+
+
 @router.post("/auth/register")
-def register(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = get_usuario_by_email(db, user_data.email)
+async def register(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(get_usuario_by_email, db, user_data.email)
     
     if db_user:
         raise HTTPException(
@@ -34,7 +46,7 @@ def register(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
             detail="Senha muito longa. Maximo 72 caracteres."
         )
     
-    hashed_password = get_password_hash(user_data.senha)
+    hashed_password = await pool_hashing.gerar_hash(user_data.senha)
     
     new_user = Usuario(
         nome=user_data.nome,
@@ -44,9 +56,7 @@ def register(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
         ativo=True
     )
     
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    new_user = await run_in_threadpool(_salvar_usuario, db, new_user)
     
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
@@ -68,11 +78,11 @@ def register(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/auth/login")
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    user = authenticate_usuario(db, form_data.username, form_data.password)
+    user = await authenticate_usuario(db, form_data.username, form_data.password)
     
     if not user:
         raise HTTPException(
@@ -101,7 +111,15 @@ def login(
 
 
 @router.get("/auth/me")
-async def get_me(current_user: Usuario = Depends(get_current_usuario)):
+async def get_me(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_principal)
+):
+    etag = etag_conteudo(*astuple(current_user))
+    if etag_corresponde(if_none_match, etag):
+        return nao_modificado(etag)
+    response.headers["ETag"] = etag
     return {
         "id": current_user.id,
         "nome": current_user.nome,
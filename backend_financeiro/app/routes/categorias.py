@@ -1,30 +1,27 @@
-﻿from fastapi import APIRouter, Depends
+﻿from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, Response
 from sqlalchemy.orm import Session
-from typing import List
 
-from ..database import get_db, engine
-from ..models.models import Usuario, Categoria
+from ..database import get_db
 from ..models import schemas
-from ..services.auth import get_current_usuario
+from ..services.auth import Principal, get_current_principal
+from ..services.categorias import listar_categorias_usuario
+from ..utils.etag import etag_corresponde, nao_modificado
 
 router = APIRouter()
 
 @router.get("/categorias", response_model=List[schemas.Categoria])
 def listar_categorias(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_usuario)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    # DEBUG: Mostrar URL do banco
-    print(f"🔍 ENGINE URL: {engine.url}")
-    print(f"🔍 DATABASE: {engine.url.database}")
-    print(f"🔍 HOST: {engine.url.host}")
-    print(f"🔍 PORT: {engine.url.port}")
-    
-    categorias = db.query(Categoria).filter(
-        (Categoria.usuario_id == current_user.id) |
-        (Categoria.usuario_id == None)
-    ).all()
+    categorias, etag = listar_categorias_usuario(db, current_user.id)
     
-    print(f"🔍 Total categorias: {len(categorias)}")
+    if etag_corresponde(if_none_match, etag):
+        return nao_modificado(etag)
     
-    return categorias
+    response.headers["ETag"] = etag
+    return categorias
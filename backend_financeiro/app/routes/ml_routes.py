@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import date, datetime
 
+from ..config import settings
 from ..database import get_db
-from ..models.models import Usuario, AnaliseConsumo
-from ..services.auth import get_current_usuario
+from ..models.models import AnaliseConsumo, Categoria
+from ..services.auth import Principal, get_current_principal
+from ..services.cache_previsoes import obter_ou_calcular
+from ..services.precomputo import TIPO_PRECOMPUTO
+from ..services.versao_dados import obter_versao
+from ..utils.etag import etag_corresponde, etag_versao, nao_modificado
+from ..utils.paginacao import codificar_cursor, decodificar_cursor
 
 router = APIRouter(prefix="/ml", tags=["Machine Learning"])
 
@@ -12,11 +20,12 @@ router = APIRouter(prefix="/ml", tags=["Machine Learning"])
 @router.get("/previsoes")
 def obter_previsoes(
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_usuario)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    from ml_service import PrevisaoGastosService
+    from ml_service import AnaliseSnapshot, PrevisaoGastosService
     
-    service = PrevisaoGastosService(db, current_user.id)
+    snapshot = AnaliseSnapshot(db, current_user.id)
+    service = PrevisaoGastosService(db, current_user.id, snapshot)
     previsao = service.prever_gastos_proximos_30_dias()
     
     insights = []
@@ -53,14 +62,45 @@ def obter_previsoes(
     }
 
 
+@router.get("/previsoes/categorias")
+def obter_previsoes_categorias(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    from ..ml.previsao_gastos import PrevisaoGastos
+    
+    versao = obter_versao(db, current_user.id)
+    previsoes = obter_ou_calcular(
+        current_user.id, versao, date.today(), 'previsoes_categorias',
+        PrevisaoGastos(db, current_user.id).prever_todas_categorias
+    )
+    
+    ids = [p['categoria_id'] for p in previsoes]
+    nomes = dict(
+        db.query(Categoria.id, Categoria.nome).filter(Categoria.id.in_(ids)).all()
+    ) if ids else {}
+    
+    # Dicts novos: os devolvidos por obter_ou_calcular pertencem ao cache
+    previsoes = [
+        {**previsao, 'categoria_nome': nomes.get(previsao['categoria_id'], 'Desconhecida')}
+        for previsao in previsoes
+    ]
+    
+    return {
+        "previsoes": previsoes,
+        "total": len(previsoes)
+    }
+
+
 @router.get("/alertas")
 def obter_alertas(
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_usuario)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    from ml_service import PrevisaoGastosService
+    from ml_service import AnaliseSnapshot, PrevisaoGastosService
     
-    service = PrevisaoGastosService(db, current_user.id)
+    snapshot = AnaliseSnapshot(db, current_user.id)
+    service = PrevisaoGastosService(db, current_user.id, snapshot)
     alertas = service.gerar_alertas()
     
     insights = [alerta['mensagem'] for alerta in alertas]
@@ -92,12 +132,21 @@ def obter_alertas(
 
 @router.get("/dashboard")
 def obter_dashboard_ml(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_usuario)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    from ml_service import PrevisaoGastosService
+    from ml_service import AnaliseSnapshot, PrevisaoGastosService
+    
+    # A previsão e os alertas dependem da data corrente, que também entra no ETag
+    etag = etag_versao(current_user.id, obter_versao(db, current_user.id), date.today())
+    if etag_corresponde(if_none_match, etag):
+        return nao_modificado(etag)
+    response.headers["ETag"] = etag
     
-    service = PrevisaoGastosService(db, current_user.id)
+    snapshot = AnaliseSnapshot(db, current_user.id)
+    service = PrevisaoGastosService(db, current_user.id, snapshot)
     
     previsao = service.prever_gastos_proximos_30_dias()
     alertas = service.gerar_alertas()
@@ -115,13 +164,47 @@ def obter_dashboard_ml(
 
 @router.get("/historico-analises")
 def obter_historico_analises(
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=settings.paginacao_limite_max),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_usuario)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    analises = db.query(AnaliseConsumo).filter(
-        AnaliseConsumo.usuario_id == current_user.id
-    ).order_by(AnaliseConsumo.data_criacao.desc()).limit(limit).all()
+    """Lista as análises do usuário, da mais recente para a mais antiga, paginadas por cursor"""
+    query = db.query(
+        AnaliseConsumo.id,
+        AnaliseConsumo.tipo_analise,
+        AnaliseConsumo.periodo_inicio,
+        AnaliseConsumo.periodo_fim,
+        AnaliseConsumo.insights,
+        AnaliseConsumo.recomendacoes,
+        AnaliseConsumo.score_confianca,
+        AnaliseConsumo.data_criacao
+    ).filter(
+        AnaliseConsumo.usuario_id == current_user.id,
+        AnaliseConsumo.tipo_analise != TIPO_PRECOMPUTO
+    )
+    
+    if cursor:
+        try:
+            data_cursor, id_cursor = decodificar_cursor(cursor)
+            data_cursor = datetime.fromisoformat(data_cursor)
+            if not isinstance(id_cursor, int) or isinstance(id_cursor, bool):
+                raise ValueError("Cursor invalido")
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Cursor invalido")
+        query = query.filter(
+            tuple_(AnaliseConsumo.data_criacao, AnaliseConsumo.id) < tuple_(data_cursor, id_cursor)
+        )
+    
+    analises = query.order_by(
+        AnaliseConsumo.data_criacao.desc(),
+        AnaliseConsumo.id.desc()
+    ).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(analises) > limit:
+        analises = analises[:limit]
+        next_cursor = codificar_cursor(analises[-1].data_criacao, analises[-1].id)
     
     return {
         "analises": [
@@ -137,5 +220,6 @@ def obter_historico_analises(
             }
             for a in analises
         ],
-        "total": len(analises)
-    }
\ No newline at end of file
+        "total": len(analises),
+        "next_cursor": next_cursor
+    }
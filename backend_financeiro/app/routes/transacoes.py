@@ -1,96 +1,241 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert, tuple_, update
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import date
 
+from ..config import settings
 from ..database import get_db
-from ..models.models import Usuario, Transacao, ContaBancaria
+from ..models.models import Transacao
 from ..models import schemas
-from ..services.auth import get_current_usuario
+from ..services.auth import Principal, get_current_principal
+from ..services.versao_dados import incrementar_versao, obter_versao
+from ..services.contas import obter_conta_padrao_id
+from ..services.importacao import FORMATOS, importar_transacoes
+from ..services.exportacao import FORMATOS_EXPORTACAO, exportar_transacoes, parquet_disponivel
+from ..services.lote_transacoes import LoteRejeitado, aplicar_lote
+from ..utils.etag import etag_corresponde, etag_versao, nao_modificado
+from ..utils.json_rapido import resposta_json
+from ..utils.paginacao import codificar_cursor, decodificar_cursor
 
 router = APIRouter()
 
+# Colunas devolvidas pelo RETURNING das escritas: o resultado já traz os defaults do servidor
+# e não é expirado pelo commit, dispensando o SELECT do db.refresh()
+COLUNAS_TRANSACAO = tuple(Transacao.__table__.columns)
 
-@router.get("/transacoes", response_model=List[schemas.Transacao])
+# Campos da listagem, na ordem de schemas.Transacao
+CAMPOS_LISTAGEM = tuple(schemas.Transacao.model_fields)
+
+
+def transacoes_para_json(linhas) -> list:
+    """Converte as linhas da listagem em dicts para o orjson, sem revalidar cada uma pelo Pydantic"""
+    itens = []
+    for linha in linhas:
+        item = dict(zip(CAMPOS_LISTAGEM, linha))
+        item["valor"] = float(item["valor"])
+        itens.append(item)
+    return itens
+
+
+def filtros_transacoes(
+    usuario_id: int,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    tipo: Optional[str] = None
+) -> list:
+    """Condições de filtro comuns à listagem e à exportação"""
+    filtros = [Transacao.usuario_id == usuario_id]
+    if data_inicio:
+        filtros.append(Transacao.data_transacao >= data_inicio)
+    if data_fim:
+        filtros.append(Transacao.data_transacao <= data_fim)
+    if tipo:
+        filtros.append(Transacao.tipo == tipo)
+    return filtros
+
+
+@router.get("/transacoes", response_model=Union[List[schemas.Transacao], schemas.PaginaTransacoes])
 def listar_transacoes(
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=settings.paginacao_limite_max),
     data_inicio: Optional[date] = None,
     data_fim: Optional[date] = None,
     tipo: Optional[str] = None,
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_usuario)
+    current_user: Principal = Depends(get_current_principal)
 ):
-    """Lista todas as transações do usuário com filtros opcionais"""
-    query = db.query(Transacao).filter(
-        Transacao.usuario_id == current_user.id
+    """Lista todas as transações do usuário com filtros opcionais.
+
+    Sem `cursor`, pagina por skip/limit e retorna uma lista. Com `cursor` (vazio na primeira
+    página), pagina por (data_transacao, id) e retorna {"transacoes", "next_cursor"}.
+    O ETag vem da versão dos dados do usuário; com If-None-Match igual, responde 304 sem
+    consultar as transações.
+    
+    As colunas são lidas como tuplas e codificadas pelo orjson, com o mesmo JSON que
+    schemas.Transacao produziria, sem montar objetos ORM nem modelos por linha.
+    """
+    etag = etag_versao(current_user.id, obter_versao(db, current_user.id))
+    if etag_corresponde(if_none_match, etag):
+        return nao_modificado(etag)
+    
+    query = db.query(
+        *(getattr(Transacao, campo) for campo in CAMPOS_LISTAGEM)
+    ).filter(
+        *filtros_transacoes(current_user.id, data_inicio, data_fim, tipo)
     )
     
-    if data_inicio:
-        query = query.filter(Transacao.data_transacao >= data_inicio)
-    if data_fim:
-        query = query.filter(Transacao.data_transacao <= data_fim)
-    if tipo:
-        query = query.filter(Transacao.tipo == tipo)
+    if cursor is None:
+        transacoes = query.order_by(
+            Transacao.data_transacao.desc(),
+            Transacao.id.desc()
+        ).offset(skip).limit(limit).all()
+        return resposta_json(transacoes_para_json(transacoes), headers={"ETag": etag})
+    
+    if cursor:
+        try:
+            data_cursor, id_cursor = decodificar_cursor(cursor)
+            data_cursor = date.fromisoformat(data_cursor)
+            if not isinstance(id_cursor, int) or isinstance(id_cursor, bool):
+                raise ValueError("Cursor invalido")
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Cursor invalido")
+        query = query.filter(
+            tuple_(Transacao.data_transacao, Transacao.id) < tuple_(data_cursor, id_cursor)
+        )
     
     transacoes = query.order_by(
-        Transacao.data_transacao.desc()
-    ).offset(skip).limit(limit).all()
+        Transacao.data_transacao.desc(),
+        Transacao.id.desc()
+    ).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(transacoes) > limit:
+        transacoes = transacoes[:limit]
+        next_cursor = codificar_cursor(transacoes[-1].data_transacao, transacoes[-1].id)
     
-    return transacoes
+    return resposta_json(
+        {"transacoes": transacoes_para_json(transacoes), "next_cursor": next_cursor},
+        headers={"ETag": etag}
+    )
 
 
 @router.post("/transacoes", response_model=schemas.Transacao, status_code=status.HTTP_201_CREATED)
 def criar_transacao(
     transacao: schemas.TransacaoCreate,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_usuario)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Cria uma nova transação"""
+    conta_id = obter_conta_padrao_id(db, current_user.id)
     
-    conta_padrao = db.query(ContaBancaria).filter(
-        ContaBancaria.usuario_id == current_user.id,
-        ContaBancaria.ativa == True
-    ).first()
-    
-    if not conta_padrao:
-        conta_padrao = ContaBancaria(
+    db_transacao = db.execute(
+        insert(Transacao).values(
             usuario_id=current_user.id,
-            nome="Conta Principal",
-            tipo="carteira",
-            saldo_inicial=0.00,
-            saldo_atual=0.00,
-            ativa=True
-        )
-        db.add(conta_padrao)
-        db.commit()
-        db.refresh(conta_padrao)
-    
-    db_transacao = Transacao(
-        usuario_id=current_user.id,
-        categoria_id=transacao.categoria_id,
-        conta_id=conta_padrao.id,
-        tipo=transacao.tipo,
-        valor=transacao.valor,
-        descricao=transacao.descricao,
-        data_transacao=transacao.data,
-        efetivada=transacao.efetivada,
-        observacoes=transacao.observacoes,
-        recorrente=False
-    )
+            categoria_id=transacao.categoria_id,
+            conta_id=conta_id,
+            tipo=transacao.tipo,
+            valor=transacao.valor,
+            descricao=transacao.descricao,
+            data_transacao=transacao.data,
+            efetivada=transacao.efetivada,
+            observacoes=transacao.observacoes,
+            recorrente=False
+        ).returning(*COLUNAS_TRANSACAO)
+    ).one()
     
-    db.add(db_transacao)
+    incrementar_versao(db, current_user.id)
     db.commit()
-    db.refresh(db_transacao)
     
     return db_transacao
 
 
+@router.post("/transacoes/batch", response_model=List[schemas.ResultadoOperacaoTransacao])
+def processar_lote_transacoes(
+    lote: schemas.LoteTransacoes,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Aplica um lote de operações (criar, atualizar, excluir) em uma única transação.
+
+    Retorna um resultado por operação, na ordem recebida; operações inválidas trazem `erro`
+    e não impedem as demais.
+    """
+    if len(lote.operacoes) > settings.transacoes_lote_max:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Lote excede o limite de {settings.transacoes_lote_max} operacoes"
+        )
+    
+    try:
+        return aplicar_lote(db, current_user.id, lote.operacoes)
+    except LoteRejeitado as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Lote rejeitado pelo banco de dados; nenhuma operacao foi aplicada: {e}"
+        )
+
+
+@router.post("/transacoes/importar", response_model=schemas.ResultadoImportacao)
+def importar_arquivo_transacoes(
+    arquivo: UploadFile = File(...),
+    formato: Optional[str] = None,
+    categoria_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Importa transações de um arquivo CSV ou OFX.
+
+    Linhas inválidas são ignoradas e listadas no relatório; as válidas são gravadas em uma
+    única transação. `categoria_id` é usado nas linhas sem categoria (todas, no OFX).
+    """
+    if formato is None:
+        formato = (arquivo.filename or "").rsplit(".", 1)[-1].lower()
+    if formato not in FORMATOS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato nao suportado; use csv ou ofx"
+        )
+    
+    return importar_transacoes(db, current_user.id, arquivo.file, formato, categoria_id)
+
+
+@router.get("/transacoes/export")
+def exportar_historico_transacoes(
+    formato: str = "csv",
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    tipo: Optional[str] = None,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Exporta as transações do usuário em CSV, NDJSON ou Parquet, em streaming"""
+    if formato not in FORMATOS_EXPORTACAO:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato nao suportado; use csv, ndjson ou parquet"
+        )
+    if formato == "parquet" and not parquet_disponivel():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Exportacao parquet requer o pacote pyarrow"
+        )
+    
+    filtros = filtros_transacoes(current_user.id, data_inicio, data_fim, tipo)
+    return StreamingResponse(
+        exportar_transacoes(filtros, formato),
+        media_type=FORMATOS_EXPORTACAO[formato],
+        headers={"Content-Disposition": f'attachment; filename="transacoes.{formato}"'}
+    )
+
+
 @router.get("/transacoes/{transacao_id}", response_model=schemas.Transacao)
 def obter_transacao(
     transacao_id: int,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_usuario)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Obtém uma transação específica"""
     transacao = db.query(Transacao).filter(
@@ -112,12 +257,23 @@ def atualizar_transacao(
     transacao_id: int,
     transacao_update: schemas.TransacaoUpdate,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_usuario)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Atualiza uma transação existente"""
-    transacao = db.query(Transacao).filter(
-        Transacao.id == transacao_id,
-        Transacao.usuario_id == current_user.id
+    update_data = transacao_update.dict(exclude_unset=True)
+    
+    if 'data' in update_data:
+        update_data['data_transacao'] = update_data.pop('data')
+    
+    if not update_data:
+        return obter_transacao(transacao_id, db, current_user)
+    
+    transacao = db.execute(
+        update(Transacao).where(
+            Transacao.id == transacao_id,
+            Transacao.usuario_id == current_user.id
+        ).values(**update_data).returning(*COLUNAS_TRANSACAO),
+        execution_options={"synchronize_session": False}
     ).first()
     
     if not transacao:
@@ -126,16 +282,8 @@ def atualizar_transacao(
             detail="Transacao nao encontrada"
         )
     
-    update_data = transacao_update.dict(exclude_unset=True)
-    
-    if 'data' in update_data:
-        update_data['data_transacao'] = update_data.pop('data')
-    
-    for key, value in update_data.items():
-        setattr(transacao, key, value)
-    
+    incrementar_versao(db, current_user.id)
     db.commit()
-    db.refresh(transacao)
     
     return transacao
 
@@ -144,21 +292,24 @@ def atualizar_transacao(
 def deletar_transacao(
     transacao_id: int,
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_usuario)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Deleta uma transação permanentemente"""
-    transacao = db.query(Transacao).filter(
-        Transacao.id == transacao_id,
-        Transacao.usuario_id == current_user.id
+    removida = db.execute(
+        delete(Transacao).where(
+            Transacao.id == transacao_id,
+            Transacao.usuario_id == current_user.id
+        ).returning(Transacao.id),
+        execution_options={"synchronize_session": False}
     ).first()
     
-    if not transacao:
+    if not removida:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Transacao nao encontrada"
         )
     
-    db.delete(transacao)
+    incrementar_versao(db, current_user.id)
     db.commit()
     
     return None
\ No newline at end of file
@@ -1,35 +1,37 @@
+import secrets
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_db, SessionLocal
 from ..models.models import Usuario
 from ..config import settings
+from ..utils.cache import CacheLRU
+from .hashing import pool_hashing
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    try:
-        if len(plain_password) > 72:
-            plain_password = plain_password[:72]
-        return pwd_context.verify(plain_password, hashed_password)
-    except Exception as e:
-        print(f"Erro ao verificar senha: {e}")
-        return False
-
-
+@dataclass(frozen=True)
+class Principal:
+    """Dados do usuário autenticado necessários às rotas, sem a sessão nem o objeto ORM"""
+    id: int
+    nome: str
+    email: str
+    ativo: bool
+    moeda_padrao: Optional[str]
 
-def get_password_hash(password: str) -> str:
-    if len(password) > 72:
-        password = password[:72]
-    return pwd_context.hash(password)
 
+# Principais verificados por email (subject do token). O TTL limita por quanto tempo uma
+# alteração feita em outro worker pode passar despercebida; neste processo, os eventos de
+# Usuario no fim do módulo removem a entrada na hora.
+cache_principais = CacheLRU(settings.auth_cache_max_entradas, settings.auth_cache_ttl_segundos)
 
 
 def get_usuario_by_email(db: Session, email: str) -> Optional[Usuario]:
@@ -37,25 +39,25 @@ def get_usuario_by_email(db: Session, email: str) -> Optional[Usuario]:
     return db.query(Usuario).filter(Usuario.email == email).first()
 
 
-def authenticate_usuario(db: Session, email: str, senha: str) -> Optional[Usuario]:
-    print(f"DEBUG: Tentando autenticar: {email}")
-    usuario = get_usuario_by_email(db, email)
-    if not usuario:
-        print("DEBUG: Usuario nao encontrado")
-        return None
-    print(f"DEBUG: Usuario encontrado: {usuario.email}")
-    if not usuario.senha_hash:
-        print("DEBUG: Senha hash vazia")
+def _regravar_hash(db: Session, usuario: Usuario, novo_hash: str) -> None:
+    # O commit expira o objeto; o refresh no mesmo thread evita um SELECT síncrono no event loop
+    usuario.senha_hash = novo_hash
+    db.commit()
+    db.refresh(usuario)
+
+
+async def authenticate_usuario(db: Session, email: str, senha: str) -> Optional[Usuario]:
+    """Autentica pelo pool de hashing; se o hash usa outro custo de bcrypt, regrava com o atual"""
+    usuario = await run_in_threadpool(get_usuario_by_email, db, email)
+    if not usuario or not usuario.senha_hash:
         return None
-    print("DEBUG: Verificando senha...")
-    try:
-        if not verify_password(senha, str(usuario.senha_hash)):
-            print("DEBUG: Senha incorreta")
-            return None
-    except Exception as e:
-        print(f"DEBUG: Erro ao verificar senha: {e}")
+    
+    valida, novo_hash = await pool_hashing.verificar(senha, str(usuario.senha_hash))
+    if not valida:
         return None
-    print("DEBUG: Autenticacao bem-sucedida")
+    
+    if novo_hash:
+        await run_in_threadpool(_regravar_hash, db, usuario, novo_hash)
     return usuario
 
 
@@ -76,30 +78,82 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-async def get_current_usuario(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> Usuario:
-    """Obtém o usuário atual a partir do token JWT"""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Não foi possível validar as credenciais",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def _email_do_token(token: str) -> str:
     try:
         payload = jwt.decode(
             token, 
             settings.secret_key, 
             algorithms=[settings.algorithm]
         )
-        email: Optional[str] = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    email: Optional[str] = payload.get("sub")
+    if email is None:
+        raise _credentials_exception()
+    return email
+
+
+def _carregar_principal(email: str) -> Optional[Principal]:
+    with SessionLocal() as db:
+        linha = db.query(
+            Usuario.id, Usuario.nome, Usuario.email, Usuario.ativo, Usuario.moeda_padrao
+        ).filter(Usuario.email == email).first()
+    if linha is None:
+        return None
+    return Principal(
+        id=linha.id,
+        nome=linha.nome,
+        email=linha.email,
+        ativo=bool(linha.ativo),
+        moeda_padrao=linha.moeda_padrao
+    )
+
+
+async def get_current_principal(token: str = Depends(oauth2_scheme)) -> Principal:
+    """Obtém o usuário autenticado a partir do token JWT, consultando o banco só em cache miss.
+    
+    Dependência preferencial das rotas que só precisam de id/email/ativo/moeda_padrao. A
+    consulta roda no threadpool com sessão própria; em um acerto nenhuma conexão é usada.
+    """
+    email = _email_do_token(token)
     
-    usuario = get_usuario_by_email(db, email)
+    principal = cache_principais.obter(email)
+    if principal is None:
+        principal = await run_in_threadpool(_carregar_principal, email)
+        if principal is None:
+            raise _credentials_exception()
+        cache_principais.definir(email, principal)
+    
+    if not principal.ativo:
+        raise HTTPException(
+            status_code=400, 
+            detail="Usuário inativo"
+        )
+    
+    return principal
+
+
+async def get_current_usuario(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> Usuario:
+    """Obtém o objeto ORM do usuário atual a partir do token JWT.
+    
+    Para rotas que precisam alterar o usuário; as demais devem usar get_current_principal.
+    A consulta ao banco é síncrona e roda no threadpool para não bloquear o event loop.
+    """
+    credentials_exception = _credentials_exception()
+    email = _email_do_token(token)
+    
+    usuario = await run_in_threadpool(get_usuario_by_email, db, email)
     if usuario is None:
         raise credentials_exception
     
@@ -109,4 +163,23 @@ async def get_current_usuario(
             detail="Usuário inativo"
         )
     
-    return usuario
\ No newline at end of file
+    return usuario
+
+
+def exigir_token_metricas(x_metricas_token: Optional[str] = Header(None)) -> None:
+    """Libera as rotas de operação só para quem envia METRICAS_TOKEN; sem token configurado, ficam desativadas"""
+    if not settings.metricas_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_metricas_token or not secrets.compare_digest(x_metricas_token, settings.metricas_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Token de metricas invalido")
+
+
+def _invalidar_principal(mapper, connection, alvo):
+    cache_principais.remover(alvo.email)
+    # Em uma troca de email, o email anterior também sai do cache
+    for email_anterior in inspect(alvo).attrs.email.history.deleted or ():
+        cache_principais.remover(email_anterior)
+
+
+for _evento in ("after_update", "after_delete"):
+    event.listen(Usuario, _evento, _invalidar_principal)
@@ -0,0 +1,27 @@
+import copy
+from datetime import date
+from typing import Callable, Dict
+
+from ..config import settings
+from ..utils.cache import CacheLRU
+
+cache_previsoes = CacheLRU(settings.ml_cache_max_entradas)
+
+_AUSENTE = object()
+
+
+def obter_ou_calcular(usuario_id: int, versao: int, hoje: date, nome: str, calcular: Callable):
+    """Retorna o resultado em cache para (usuário, versão dos dados, dia) ou calcula e armazena.
+    
+    O dia faz parte da chave porque as janelas de análise são relativas à data atual.
+    """
+    chave = (usuario_id, versao, hoje, nome)
+    valor = cache_previsoes.obter(chave, _AUSENTE)
+    if valor is _AUSENTE:
+        valor = calcular()
+        cache_previsoes.definir(chave, valor)
+    return copy.deepcopy(valor)
+
+
+def estatisticas() -> Dict:
+    return cache_previsoes.estatisticas()
@@ -0,0 +1,65 @@
+"""Categorias visíveis ao usuário: as globais (usuario_id nulo) e as próprias.
+
+A listagem fica em cache por processo em duas partes: as categorias globais, sob a chave
+None, compartilhadas por todos os usuários, e as de cada usuário, sob o id dele. Cada parte
+guarda também o hash do seu conteúdo, usado para montar o ETag da resposta. Os eventos de
+mapper abaixo removem a parte afetada quando uma categoria é criada, alterada ou excluída;
+o TTL (CATEGORIAS_CACHE_TTL_SEGUNDOS) limita a defasagem de alterações feitas por outros
+workers ou direto no banco.
+"""
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import schemas
+from ..models.models import Categoria
+from ..utils.cache import CacheLRU
+from ..utils.etag import etag_conteudo
+
+cache_categorias = CacheLRU(settings.categorias_cache_max_entradas, settings.categorias_cache_ttl_segundos)
+
+
+def tipos_categorias(db: Session, usuario_id: int) -> Dict[int, str]:
+    """Mapa id -> tipo das categorias ativas visíveis ao usuário (próprias e globais)"""
+    return dict(
+        db.query(Categoria.id, Categoria.tipo).filter(
+            (Categoria.usuario_id == usuario_id) | (Categoria.usuario_id == None),
+            Categoria.ativo == True
+        ).all()
+    )
+
+
+def _carregar(db: Session, usuario_id: Optional[int]) -> Tuple[List[schemas.Categoria], str]:
+    categorias = [
+        schemas.Categoria.model_validate(c)
+        for c in db.query(Categoria).filter(Categoria.usuario_id == usuario_id).order_by(Categoria.id)
+    ]
+    conteudo = json.dumps([c.model_dump(mode="json") for c in categorias], sort_keys=True)
+    return categorias, hashlib.sha1(conteudo.encode("utf-8")).hexdigest()[:16]
+
+
+def _parte(db: Session, usuario_id: Optional[int]) -> Tuple[List[schemas.Categoria], str]:
+    parte = cache_categorias.obter(usuario_id)
+    if parte is None:
+        parte = _carregar(db, usuario_id)
+        cache_categorias.definir(usuario_id, parte)
+    return parte
+
+
+def listar_categorias_usuario(db: Session, usuario_id: int) -> Tuple[List[schemas.Categoria], str]:
+    """Retorna (categorias globais + do usuário, ETag); sem consulta quando as duas partes estão em cache"""
+    globais, hash_globais = _parte(db, None)
+    proprias, hash_proprias = _parte(db, usuario_id)
+    return globais + proprias, etag_conteudo(hash_globais, hash_proprias)
+
+
+def _invalidar_categorias(mapper, connection, alvo):
+    cache_categorias.remover(alvo.usuario_id)
+
+
+for _evento in ("after_insert", "after_update", "after_delete"):
+    event.listen(Categoria, _evento, _invalidar_categorias)
@@ -0,0 +1,55 @@
+"""Conta padrão do usuário, usada nas transações criadas sem conta explícita.
+
+O id fica em cache por processo para que o caminho de escrita não consulte conta_bancaria a
+cada inserção. Os eventos de mapper abaixo removem a entrada quando qualquer conta do usuário
+é criada, alterada ou excluída neste processo; o TTL (CONTAS_CACHE_TTL_SEGUNDOS) limita por
+quanto tempo uma alteração feita em outro worker pode passar despercebida.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.models import ContaBancaria
+from ..utils.cache import CacheLRU
+
+cache_contas_padrao = CacheLRU(settings.contas_cache_max_entradas, settings.contas_cache_ttl_segundos)
+
+
+def obter_conta_padrao_id(db: Session, usuario_id: int) -> int:
+    """Retorna o id da primeira conta ativa do usuário, criando a "Conta Principal" se não houver.
+    
+    A conta criada entra na transação corrente (flush, sem commit), junto com a escrita que a
+    motivou; só ids já existentes no banco vão para o cache.
+    """
+    conta_id = cache_contas_padrao.obter(usuario_id)
+    if conta_id is not None:
+        return conta_id
+    
+    conta_id = db.query(ContaBancaria.id).filter(
+        ContaBancaria.usuario_id == usuario_id,
+        ContaBancaria.ativa == True
+    ).order_by(ContaBancaria.id).limit(1).scalar()
+    
+    if conta_id is not None:
+        cache_contas_padrao.definir(usuario_id, conta_id)
+        return conta_id
+    
+    conta_padrao = ContaBancaria(
+        usuario_id=usuario_id,
+        nome="Conta Principal",
+        tipo="carteira",
+        saldo_inicial=0.00,
+        saldo_atual=0.00,
+        ativa=True
+    )
+    db.add(conta_padrao)
+    db.flush()
+    return conta_padrao.id
+
+
+def _invalidar_conta_padrao(mapper, connection, alvo):
+    cache_contas_padrao.remover(alvo.usuario_id)
+
+
+for _evento in ("after_insert", "after_update", "after_delete"):
+    event.listen(ContaBancaria, _evento, _invalidar_conta_padrao)
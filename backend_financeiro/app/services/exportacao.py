@@ -0,0 +1,170 @@
+"""Exportação do histórico de transações em CSV, NDJSON ou Parquet, em streaming.
+
+As linhas são lidas por um cursor do lado do servidor (stream_results) em lotes de
+EXPORTACAO_LINHAS_POR_LOTE e convertidas direto em bytes, sem montar objetos ORM nem
+modelos Pydantic; a memória usada não depende do total de linhas. O gerador abre a própria
+sessão porque a sessão da dependência get_db é fechada antes do corpo da resposta ser enviado.
+"""
+import csv
+import io
+import json
+from typing import Iterator, List
+
+from sqlalchemy import select
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.models import Categoria, Transacao
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# formato -> tipo de conteúdo
+FORMATOS_EXPORTACAO = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+COLUNAS = [
+    "id", "data_transacao", "tipo", "valor", "descricao", "categoria_id", "categoria",
+    "conta_id", "efetivada", "observacoes", "data_criacao"
+]
+
+
+def parquet_disponivel() -> bool:
+    return pq is not None
+
+
+def _consulta(filtros: list):
+    return select(
+        Transacao.id,
+        Transacao.data_transacao,
+        Transacao.tipo,
+        Transacao.valor,
+        Transacao.descricao,
+        Transacao.categoria_id,
+        Categoria.nome,
+        Transacao.conta_id,
+        Transacao.efetivada,
+        Transacao.observacoes,
+        Transacao.data_criacao
+    ).outerjoin(
+        Categoria, Categoria.id == Transacao.categoria_id
+    ).where(
+        *filtros
+    ).order_by(
+        Transacao.data_transacao.desc(),
+        Transacao.id.desc()
+    )
+
+
+def _lotes(filtros: list) -> Iterator[List[tuple]]:
+    db = SessionLocal()
+    try:
+        resultado = db.execute(
+            _consulta(filtros),
+            execution_options={"stream_results": True, "yield_per": settings.exportacao_linhas_por_lote}
+        )
+        for lote in resultado.partitions():
+            yield lote
+    finally:
+        db.close()
+
+
+def _csv(filtros: list) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUNAS)
+    for lote in _lotes(filtros):
+        escritor.writerows(lote)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _json_padrao(valor):
+    if hasattr(valor, "isoformat"):
+        return valor.isoformat()
+    return float(valor)
+
+
+def _ndjson(filtros: list) -> Iterator[bytes]:
+    for lote in _lotes(filtros):
+        yield "".join(
+            json.dumps(dict(zip(COLUNAS, linha)), default=_json_padrao, ensure_ascii=False) + "\n"
+            for linha in lote
+        ).encode("utf-8")
+
+
+class _SaidaParquet:
+    """Destino de escrita do ParquetWriter que entrega os bytes produzidos a cada row group"""
+    
+    def __init__(self):
+        self._partes = []
+        self._posicao = 0
+        self.closed = False
+    
+    def write(self, dados) -> int:
+        dados = bytes(dados)
+        self._partes.append(dados)
+        self._posicao += len(dados)
+        return len(dados)
+    
+    def tell(self) -> int:
+        return self._posicao
+    
+    def flush(self) -> None:
+        pass
+    
+    def close(self) -> None:
+        self.closed = True
+    
+    def drenar(self) -> bytes:
+        dados = b"".join(self._partes)
+        self._partes = []
+        return dados
+
+
+def _parquet(filtros: list) -> Iterator[bytes]:
+    esquema = pa.schema([
+        ("id", pa.int64()),
+        ("data_transacao", pa.date32()),
+        ("tipo", pa.string()),
+        ("valor", pa.decimal128(15, 2)),
+        ("descricao", pa.string()),
+        ("categoria_id", pa.int64()),
+        ("categoria", pa.string()),
+        ("conta_id", pa.int64()),
+        ("efetivada", pa.bool_()),
+        ("observacoes", pa.string()),
+        ("data_criacao", pa.timestamp("us", tz="UTC")),
+    ])
+    saida = _SaidaParquet()
+    escritor = pq.ParquetWriter(saida, esquema)
+    try:
+        for lote in _lotes(filtros):
+            colunas = list(zip(*lote))
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(colunas, esquema)],
+                schema=esquema
+            ))
+            yield saida.drenar()
+    finally:
+        escritor.close()
+    yield saida.drenar()
+
+
+def exportar_transacoes(filtros: list, formato: str) -> Iterator[bytes]:
+    """Gera o conteúdo do arquivo exportado em blocos de bytes"""
+    if formato == "parquet":
+        return _parquet(filtros)
+    if formato == "ndjson":
+        return _ndjson(filtros)
+    return _csv(filtros)
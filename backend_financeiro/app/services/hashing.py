@@ -0,0 +1,132 @@
+"""Pool de processos dedicado ao bcrypt (login e cadastro).
+
+O bcrypt é deliberadamente lento e, no threadpool compartilhado do FastAPI, uma rajada de
+logins ocupava as threads que atendem as demais rotas. Aqui o hashing roda em um
+ProcessPoolExecutor pequeno e separado (HASH_PROCESSOS). No máximo HASH_FILA_MAX operações
+ficam pendentes; acima disso a requisição é recusada na hora com 503, em vez de esperar.
+
+Os processos são criados com "spawn": não herdam as conexões do pool do SQLAlchemy e só
+importam este módulo.
+"""
+import asyncio
+import multiprocessing
+import statistics
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from ..config import settings
+
+TAMANHO_MAXIMO_SENHA = 72
+
+
+def criar_contexto() -> CryptContext:
+    """Contexto bcrypt com o custo de BCRYPT_ROUNDS; hashes com outro custo precisam de rehash"""
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=settings.bcrypt_rounds,
+        bcrypt__min_rounds=settings.bcrypt_rounds,
+        bcrypt__max_rounds=settings.bcrypt_rounds,
+    )
+
+
+_contexto_processo: Optional[CryptContext] = None
+
+
+def _contexto() -> CryptContext:
+    global _contexto_processo
+    if _contexto_processo is None:
+        _contexto_processo = criar_contexto()
+    return _contexto_processo
+
+
+def _gerar_hash(senha: str) -> str:
+    return _contexto().hash(senha[:TAMANHO_MAXIMO_SENHA])
+
+
+def _verificar_e_atualizar(senha: str, senha_hash: str) -> Tuple[bool, Optional[str]]:
+    try:
+        return _contexto().verify_and_update(senha[:TAMANHO_MAXIMO_SENHA], senha_hash)
+    except (ValueError, TypeError) as e:
+        print(f"Erro ao verificar senha: {e}")
+        return False, None
+
+
+class PoolHashing:
+    """Executa as operações de bcrypt no pool dedicado, com limite de pendências e métricas"""
+    
+    def __init__(self, processos: int, fila_max: int):
+        self.processos = processos
+        self.fila_max = fila_max
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+        self._pendentes = 0
+        self._latencias_ms = deque(maxlen=1000)
+        self.concluidas = 0
+        self.rejeitadas = 0
+    
+    def _obter_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processos,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+    
+    async def _executar(self, funcao, *args):
+        with self._lock:
+            if self._pendentes >= self.fila_max:
+                self.rejeitadas += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Servico de autenticacao sobrecarregado, tente novamente",
+                    headers={"Retry-After": "1"},
+                )
+            self._pendentes += 1
+        
+        executor = self._obter_executor()
+        inicio = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, funcao, *args)
+        finally:
+            with self._lock:
+                self._pendentes -= 1
+                self.concluidas += 1
+                self._latencias_ms.append((time.perf_counter() - inicio) * 1000)
+    
+    async def gerar_hash(self, senha: str) -> str:
+        return await self._executar(_gerar_hash, senha)
+    
+    async def verificar(self, senha: str, senha_hash: str) -> Tuple[bool, Optional[str]]:
+        """Retorna (senha correta, novo hash se o custo do hash atual estiver desatualizado)"""
+        return await self._executar(_verificar_e_atualizar, senha, senha_hash)
+    
+    def parar(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            latencias = sorted(self._latencias_ms)
+            return {
+                "processos": self.processos,
+                "fila_max": self.fila_max,
+                "pendentes": self._pendentes,
+                "concluidas": self.concluidas,
+                "rejeitadas": self.rejeitadas,
+                "bcrypt_rounds": settings.bcrypt_rounds,
+                "latencia_p50_ms": round(statistics.median(latencias), 1) if latencias else None,
+                "latencia_p99_ms": round(latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))], 1) if latencias else None,
+            }
+
+
+pool_hashing = PoolHashing(settings.hash_processos, settings.hash_fila_max)
@@ -0,0 +1,311 @@
+"""Importação em massa de transações a partir de arquivos CSV ou OFX.
+
+O arquivo é lido em streaming: cada linha é validada contra o mapa de categorias do usuário
+(carregado uma única vez) e enviada diretamente ao PostgreSQL por COPY para uma tabela
+temporária. Em seguida um único INSERT ... SELECT grava tudo em `transacao`, na mesma
+transação. A memória usada não depende do tamanho do arquivo: só os primeiros erros são
+guardados para o relatório.
+"""
+import codecs
+import csv
+import html
+import io
+import itertools
+import re
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from .categorias import tipos_categorias
+from .contas import obter_conta_padrao_id
+from .versao_dados import incrementar_versao
+
+FORMATOS = ("csv", "ofx")
+
+VALOR_MAXIMO = Decimal("9999999999999.99")
+
+_CRIAR_STAGING = text("""
+    CREATE TEMP TABLE importacao_transacao (
+        categoria_id INTEGER,
+        tipo VARCHAR(10),
+        valor NUMERIC(15, 2),
+        descricao TEXT,
+        data_transacao DATE,
+        efetivada BOOLEAN,
+        observacoes TEXT
+    ) ON COMMIT DROP
+""")
+
+_COPY_STAGING = (
+    "COPY importacao_transacao "
+    "(categoria_id, tipo, valor, descricao, data_transacao, efetivada, observacoes) FROM STDIN"
+)
+
+_INSERIR_TRANSACOES = text("""
+    INSERT INTO transacao (
+        usuario_id, conta_id, categoria_id, tipo, valor, descricao,
+        data_transacao, efetivada, observacoes, recorrente
+    )
+    SELECT :usuario_id, :conta_id, categoria_id, tipo, valor, descricao,
+           data_transacao, efetivada, observacoes, FALSE
+    FROM importacao_transacao
+""")
+
+
+class ErroLinha(ValueError):
+    pass
+
+
+def _ler_valor(bruto: str) -> Decimal:
+    bruto = (bruto or "").strip().replace("R$", "").replace(" ", "")
+    # O último separador é o decimal: "1.234,56" e "1,234.56" valem o mesmo
+    if bruto.rfind(",") > bruto.rfind("."):
+        bruto = bruto.replace(".", "").replace(",", ".")
+    else:
+        bruto = bruto.replace(",", "")
+    try:
+        valor = Decimal(bruto)
+    except InvalidOperation:
+        raise ErroLinha(f"valor invalido: {bruto!r}")
+    if not valor.is_finite():
+        raise ErroLinha(f"valor invalido: {bruto!r}")
+    return valor
+
+
+def _ler_data(bruto: str) -> date:
+    bruto = (bruto or "").strip()
+    for formato in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(bruto, formato).date()
+        except ValueError:
+            continue
+    raise ErroLinha(f"data invalida: {bruto!r}")
+
+
+def _ler_bool(bruto: Optional[str]) -> bool:
+    if bruto is None or not bruto.strip():
+        return True
+    return bruto.strip().lower() in ("1", "true", "sim", "s", "t")
+
+
+def _decodificar_linhas(arquivo: BinaryIO) -> Iterator[str]:
+    """Decodifica linha a linha: UTF-8 e, nas linhas que não forem UTF-8 válido, CP1252, a
+    codificação dos extratos exportados pela maioria dos bancos brasileiros"""
+    for numero, bruta in enumerate(arquivo):
+        if numero == 0 and bruta.startswith(codecs.BOM_UTF8):
+            bruta = bruta[len(codecs.BOM_UTF8):]
+        try:
+            yield bruta.decode("utf-8")
+        except UnicodeDecodeError:
+            yield bruta.decode("cp1252", errors="replace")
+
+
+def ler_csv(arquivo: BinaryIO) -> Iterator[Tuple[int, dict]]:
+    """Lê um CSV com cabeçalho (data, descricao, valor e opcionalmente tipo, categoria_id,
+    efetivada, observacoes). Aceita ',' ou ';' como separador e UTF-8 ou CP1252."""
+    linhas = _decodificar_linhas(arquivo)
+    inicio = list(itertools.islice(linhas, 50))
+    try:
+        dialeto = csv.Sniffer().sniff("".join(inicio)[:4096], delimiters=",;")
+    except csv.Error:
+        dialeto = csv.excel
+    
+    leitor = csv.DictReader(itertools.chain(inicio, linhas), dialect=dialeto)
+    for linha in leitor:
+        yield leitor.line_num, {(k or "").strip().lower(): v for k, v in linha.items()}
+
+
+_TAG_OFX = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+def _codificacao_ofx(cabecalho: bytes) -> str:
+    cabecalho = cabecalho.upper()
+    if b"1252" in cabecalho:
+        return "cp1252"
+    if b"8859-1" in cabecalho:
+        return "latin-1"
+    return "utf-8"
+
+
+def ler_ofx(arquivo: BinaryIO) -> Iterator[Tuple[int, dict]]:
+    """Lê os <STMTTRN> de um extrato OFX (SGML 1.x ou XML 2.x) sem carregar o arquivo todo"""
+    codificacao = _codificacao_ofx(arquivo.read(1024))
+    arquivo.seek(0)
+    texto = io.TextIOWrapper(arquivo, encoding=codificacao, errors="replace")
+    
+    numero = 0
+    atual = None
+    resto = ""
+    while True:
+        bloco = texto.read(65536)
+        dados = resto + bloco
+        # Mantém a última tag (possivelmente incompleta) para o próximo bloco
+        corte = dados.rfind("<") if bloco else -1
+        if corte < 0:
+            corte = len(dados)
+        resto = dados[corte:]
+        for fechamento, tag, valor in _TAG_OFX.findall(dados[:corte]):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if fechamento and atual is not None:
+                    numero += 1
+                    yield numero, atual
+                    atual = None
+                elif not fechamento:
+                    atual = {}
+            elif atual is not None and not fechamento:
+                atual[tag] = html.unescape(valor.strip())
+        if not bloco:
+            return
+
+
+def _normalizar_ofx(campos: dict, categoria_padrao: Optional[int]) -> dict:
+    valor = _ler_valor(campos.get("TRNAMT", ""))
+    data_bruta = campos.get("DTPOSTED", "")[:8]
+    try:
+        data = datetime.strptime(data_bruta, "%Y%m%d").date()
+    except ValueError:
+        raise ErroLinha(f"data invalida: {data_bruta!r}")
+    return {
+        "categoria_id": categoria_padrao,
+        "tipo": "receita" if valor > 0 else "despesa",
+        "valor": abs(valor),
+        "descricao": campos.get("MEMO") or campos.get("NAME") or "",
+        "data": data,
+        "efetivada": True,
+        "observacoes": f"FITID {campos['FITID']}" if campos.get("FITID") else None
+    }
+
+
+def _normalizar_csv(campos: dict, categoria_padrao: Optional[int]) -> dict:
+    valor = _ler_valor(campos.get("valor"))
+    tipo = (campos.get("tipo") or "").strip().lower() or ("receita" if valor > 0 else "despesa")
+    categoria = (campos.get("categoria_id") or "").strip()
+    try:
+        categoria_id = int(categoria) if categoria else categoria_padrao
+    except ValueError:
+        raise ErroLinha(f"categoria_id invalido: {categoria!r}")
+    return {
+        "categoria_id": categoria_id,
+        "tipo": tipo,
+        "valor": abs(valor),
+        "descricao": (campos.get("descricao") or "").strip(),
+        "data": _ler_data(campos.get("data")),
+        "efetivada": _ler_bool(campos.get("efetivada")),
+        "observacoes": (campos.get("observacoes") or "").strip() or None
+    }
+
+
+def _validar(linha: dict, categorias: Dict[int, str]) -> None:
+    if linha["tipo"] not in ("receita", "despesa"):
+        raise ErroLinha(f"tipo invalido: {linha['tipo']!r}")
+    if linha["categoria_id"] is None:
+        raise ErroLinha("categoria_id ausente")
+    tipo_categoria = categorias.get(linha["categoria_id"])
+    if tipo_categoria is None:
+        raise ErroLinha(f"categoria {linha['categoria_id']} nao encontrada")
+    if tipo_categoria != linha["tipo"]:
+        raise ErroLinha(f"categoria {linha['categoria_id']} nao aceita {linha['tipo']}")
+    if not 0 < linha["valor"] <= VALOR_MAXIMO:
+        raise ErroLinha(f"valor fora do intervalo: {linha['valor']}")
+
+
+def _campo_copy(valor) -> str:
+    if valor is None:
+        return "\\N"
+    if isinstance(valor, bool):
+        return "t" if valor else "f"
+    return (
+        str(valor)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class _FluxoCopy:
+    """Adapta um gerador de linhas ao objeto de arquivo esperado por copy_expert"""
+    
+    def __init__(self, linhas: Iterator[str]):
+        self._linhas = linhas
+        self._partes = []
+        self._tamanho = 0
+    
+    def read(self, tamanho: int = -1) -> str:
+        while tamanho < 0 or self._tamanho < tamanho:
+            linha = next(self._linhas, None)
+            if linha is None:
+                break
+            self._partes.append(linha)
+            self._tamanho += len(linha)
+        dados = "".join(self._partes)
+        if 0 <= tamanho < len(dados):
+            dados, sobra = dados[:tamanho], dados[tamanho:]
+            self._partes, self._tamanho = [sobra], len(sobra)
+        else:
+            self._partes, self._tamanho = [], 0
+        return dados
+    
+    readline = read
+
+
+def importar_transacoes(
+    db: Session,
+    usuario_id: int,
+    arquivo: BinaryIO,
+    formato: str,
+    categoria_padrao: Optional[int] = None
+) -> dict:
+    """Importa as linhas válidas do arquivo e retorna o relatório de importação"""
+    inicio = time.perf_counter()
+    
+    categorias = tipos_categorias(db, usuario_id)
+    conta_id = obter_conta_padrao_id(db, usuario_id)
+    
+    if formato == "ofx":
+        linhas, normalizar = ler_ofx(arquivo), _normalizar_ofx
+    else:
+        linhas, normalizar = ler_csv(arquivo), _normalizar_csv
+    
+    relatorio = {"linhas_lidas": 0, "total_erros": 0, "erros": []}
+    
+    def linhas_validas() -> Iterator[str]:
+        for numero, campos in linhas:
+            relatorio["linhas_lidas"] += 1
+            try:
+                linha = normalizar(campos, categoria_padrao)
+                _validar(linha, categorias)
+            except ErroLinha as e:
+                relatorio["total_erros"] += 1
+                if len(relatorio["erros"]) < settings.importacao_max_erros:
+                    relatorio["erros"].append({"linha": numero, "erro": str(e)})
+                continue
+            yield "\t".join(_campo_copy(v) for v in (
+                linha["categoria_id"], linha["tipo"], linha["valor"], linha["descricao"],
+                linha["data"], linha["efetivada"], linha["observacoes"]
+            )) + "\n"
+    
+    db.execute(_CRIAR_STAGING)
+    with db.connection().connection.cursor() as cursor:
+        cursor.copy_expert(_COPY_STAGING, _FluxoCopy(linhas_validas()), size=65536)
+    
+    importadas = db.execute(
+        _INSERIR_TRANSACOES, {"usuario_id": usuario_id, "conta_id": conta_id}
+    ).rowcount
+    if importadas:
+        incrementar_versao(db, usuario_id)
+    db.commit()
+    
+    duracao = time.perf_counter() - inicio
+    return {
+        "importadas": importadas,
+        **relatorio,
+        "duracao_segundos": round(duracao, 3),
+        "linhas_por_segundo": round(relatorio["linhas_lidas"] / duracao, 1) if duracao else 0.0
+    }
@@ -0,0 +1,183 @@
+"""Aplicação de um lote de operações (criar/atualizar/excluir) sobre transações.
+
+Usado pela sincronização offline do app: todas as operações válidas são gravadas em uma
+única transação do banco, com um INSERT, um UPDATE em lote por chave primária e um DELETE,
+em vez de uma requisição e um commit por item. Operações inválidas (transação inexistente,
+categoria incompatível etc.) recebem um erro no resultado e não impedem as demais.
+"""
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..models import schemas
+from ..models.models import Transacao
+from .categorias import tipos_categorias
+from .contas import obter_conta_padrao_id
+from .versao_dados import incrementar_versao
+
+TIPOS_TRANSACAO = ("receita", "despesa")
+
+# Colunas NOT NULL que o cliente pode alterar: null explícito é erro do item, não do lote
+CAMPOS_OBRIGATORIOS = ("valor", "data", "tipo", "categoria_id")
+
+
+class LoteRejeitado(Exception):
+    """O banco recusou o lote; nenhuma operação foi aplicada"""
+
+
+def _erro(indice: int, operacao: schemas.OperacaoTransacao, mensagem: str) -> dict:
+    return {
+        "indice": indice,
+        "referencia": operacao.referencia,
+        "operacao": operacao.operacao,
+        "sucesso": False,
+        "id": operacao.id,
+        "erro": mensagem
+    }
+
+
+def _validar_tipo_categoria(tipo: str, categoria_id: int, categorias: Dict[int, str]) -> Optional[str]:
+    if tipo not in TIPOS_TRANSACAO:
+        return f"tipo invalido: {tipo}"
+    tipo_categoria = categorias.get(categoria_id)
+    if tipo_categoria is None:
+        return f"categoria {categoria_id} nao encontrada"
+    if tipo_categoria != tipo:
+        return f"categoria {categoria_id} nao aceita {tipo}"
+    return None
+
+
+def aplicar_lote(db: Session, usuario_id: int, operacoes: List[schemas.OperacaoTransacao]) -> List[dict]:
+    """Valida e aplica as operações; retorna um resultado por operação, na ordem recebida"""
+    categorias = tipos_categorias(db, usuario_id)
+    
+    ids_existentes = {op.id for op in operacoes if op.operacao != "criar" and op.id is not None}
+    atuais = {
+        linha.id: {"tipo": linha.tipo, "categoria_id": linha.categoria_id}
+        for linha in db.query(Transacao.id, Transacao.tipo, Transacao.categoria_id).filter(
+            Transacao.id.in_(ids_existentes),
+            Transacao.usuario_id == usuario_id
+        )
+    } if ids_existentes else {}
+    
+    resultados: List[Optional[dict]] = [None] * len(operacoes)
+    criacoes = []
+    alteracoes: Dict[int, dict] = {}
+    exclusoes = set()
+    indices_por_id: Dict[int, List[int]] = {}
+    
+    for indice, op in enumerate(operacoes):
+        if op.operacao == "criar":
+            if op.transacao is None:
+                resultados[indice] = _erro(indice, op, "campo transacao obrigatorio")
+                continue
+            erro = _validar_tipo_categoria(op.transacao.tipo, op.transacao.categoria_id, categorias)
+            if erro:
+                resultados[indice] = _erro(indice, op, erro)
+                continue
+            criacoes.append((indice, op.transacao))
+            continue
+        
+        if op.id is None or op.id not in atuais:
+            resultados[indice] = _erro(indice, op, "Transacao nao encontrada")
+            continue
+        if op.id in exclusoes:
+            resultados[indice] = _erro(indice, op, "Transacao excluida anteriormente no lote")
+            continue
+        
+        if op.operacao == "excluir":
+            exclusoes.add(op.id)
+            alteracoes.pop(op.id, None)
+            indices_por_id.setdefault(op.id, []).append(indice)
+            continue
+        
+        dados = op.alteracoes.model_dump(exclude_unset=True) if op.alteracoes else {}
+        nulos = [campo for campo in CAMPOS_OBRIGATORIOS if campo in dados and dados[campo] is None]
+        if nulos:
+            resultados[indice] = _erro(indice, op, f"campos nao podem ser nulos: {', '.join(nulos)}")
+            continue
+        if "data" in dados:
+            dados["data_transacao"] = dados.pop("data")
+        if "valor" in dados and dados["valor"] <= 0:
+            resultados[indice] = _erro(indice, op, "valor deve ser maior que zero")
+            continue
+        
+        # Validação sobre o estado resultante (atual + alterações anteriores do lote)
+        acumulado = {**atuais[op.id], **alteracoes.get(op.id, {}), **dados}
+        erro = _validar_tipo_categoria(acumulado["tipo"], acumulado["categoria_id"], categorias)
+        if erro:
+            resultados[indice] = _erro(indice, op, erro)
+            continue
+        
+        alteracoes.setdefault(op.id, {}).update(dados)
+        indices_por_id.setdefault(op.id, []).append(indice)
+    
+    try:
+        criadas = []
+        if criacoes:
+            conta_id = obter_conta_padrao_id(db, usuario_id)
+            criadas = db.scalars(
+                insert(Transacao).returning(Transacao, sort_by_parameter_order=True),
+                [
+                    {
+                        "usuario_id": usuario_id,
+                        "categoria_id": t.categoria_id,
+                        "conta_id": conta_id,
+                        "tipo": t.tipo,
+                        "valor": t.valor,
+                        "descricao": t.descricao,
+                        "data_transacao": t.data,
+                        "efetivada": t.efetivada,
+                        "observacoes": t.observacoes,
+                        "recorrente": False
+                    }
+                    for _, t in criacoes
+                ]
+            ).all()
+        
+        lote_alteracoes = [{"id": id_, **dados} for id_, dados in alteracoes.items() if dados]
+        if lote_alteracoes:
+            db.execute(update(Transacao), lote_alteracoes)
+        
+        if exclusoes:
+            db.execute(
+                delete(Transacao).where(
+                    Transacao.id.in_(exclusoes),
+                    Transacao.usuario_id == usuario_id
+                )
+            )
+        
+        alteradas = {
+            t.id: t for t in db.query(Transacao).filter(Transacao.id.in_(alteracoes))
+        } if alteracoes else {}
+        
+        # Serializa antes do commit, que expira os objetos e forçaria um SELECT por linha
+        criadas = [schemas.Transacao.model_validate(t) for t in criadas]
+        alteradas = {id_: schemas.Transacao.model_validate(t) for id_, t in alteradas.items()}
+        
+        if criadas or alteracoes or exclusoes:
+            incrementar_versao(db, usuario_id)
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise LoteRejeitado(str(getattr(e, "orig", e))) from e
+    
+    for (indice, _), transacao in zip(criacoes, criadas):
+        resultados[indice] = {"id": transacao.id, "transacao": transacao}
+    for id_, indices in indices_por_id.items():
+        for indice in indices:
+            resultados[indice] = {"id": id_, "transacao": alteradas.get(id_)}
+    
+    for indice, op in enumerate(operacoes):
+        if resultados[indice].get("sucesso") is False:
+            continue
+        resultados[indice].update({
+            "indice": indice,
+            "referencia": op.referencia,
+            "operacao": op.operacao,
+            "sucesso": True,
+            "erro": None
+        })
+    return resultados
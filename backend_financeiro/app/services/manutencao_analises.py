@@ -0,0 +1,122 @@
+"""Retenção e compactação do histórico de analise_consumo.
+
+- Compactação: para análises mais antigas que ANALISES_COMPACTAR_APOS_DIAS, mantém apenas a
+  mais recente de cada usuário, tipo e dia.
+- Expiração: remove análises mais antigas que ANALISES_RETENCAO_DIAS.
+
+As exclusões são feitas em lotes pequenos, cada um em sua própria transação curta e com
+lock_timeout, para não segurar locks longos nem gerar picos de WAL.
+
+Uso (agendar via cron):
+    python -m app.services.manutencao_analises [--lote 5000]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from ..config import settings
+from ..database import SessionLocal
+
+_COMPACTAR = text("""
+    DELETE FROM analise_consumo
+    WHERE id IN (
+        SELECT id FROM (
+            SELECT id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY usuario_id, tipo_analise, CAST(data_criacao AS DATE)
+                       ORDER BY data_criacao DESC, id DESC
+                   ) AS posicao
+            FROM analise_consumo
+            WHERE usuario_id > :usuario_inicio
+              AND usuario_id <= :usuario_fim
+              AND data_criacao < :limite
+        ) ordenadas
+        WHERE posicao > 1
+        LIMIT :lote
+    )
+""")
+
+_EXPIRAR = text("""
+    DELETE FROM analise_consumo
+    WHERE id IN (
+        SELECT id FROM analise_consumo
+        WHERE data_criacao < :limite
+        ORDER BY data_criacao
+        LIMIT :lote
+    )
+""")
+
+_FAIXAS_USUARIOS = text("""
+    SELECT DISTINCT usuario_id FROM analise_consumo
+    WHERE usuario_id > :ultimo AND data_criacao < :limite
+    ORDER BY usuario_id
+    LIMIT :quantidade
+""")
+
+
+def _excluir_em_lotes(instrucao, parametros: dict) -> int:
+    total = 0
+    while True:
+        db = SessionLocal()
+        try:
+            db.execute(text("SET LOCAL lock_timeout = '2s'"))
+            removidas = db.execute(instrucao, parametros).rowcount
+            db.commit()
+        finally:
+            db.close()
+        total += removidas
+        if removidas < parametros["lote"]:
+            return total
+
+
+def compactar(lote: int, usuarios_por_faixa: int = 500) -> int:
+    limite = datetime.now(timezone.utc) - timedelta(days=settings.analises_compactar_apos_dias)
+    total = 0
+    ultimo = 0
+    while True:
+        db = SessionLocal()
+        try:
+            usuarios = [
+                linha[0] for linha in db.execute(
+                    _FAIXAS_USUARIOS,
+                    {"ultimo": ultimo, "limite": limite, "quantidade": usuarios_por_faixa}
+                )
+            ]
+        finally:
+            db.close()
+        if not usuarios:
+            return total
+        total += _excluir_em_lotes(_COMPACTAR, {
+            "usuario_inicio": ultimo,
+            "usuario_fim": usuarios[-1],
+            "limite": limite,
+            "lote": lote
+        })
+        ultimo = usuarios[-1]
+
+
+def expirar(lote: int) -> int:
+    limite = datetime.now(timezone.utc) - timedelta(days=settings.analises_retencao_dias)
+    return _excluir_em_lotes(_EXPIRAR, {"limite": limite, "lote": lote})
+
+
+def executar(lote: int = None) -> dict:
+    lote = lote or settings.analises_lote_manutencao
+    inicio = time.perf_counter()
+    expiradas = expirar(lote)
+    compactadas = compactar(lote)
+    print(
+        f"Manutenção de análises: {expiradas} expiradas, {compactadas} compactadas "
+        f"em {time.perf_counter() - inicio:.1f}s"
+    )
+    return {"expiradas": expiradas, "compactadas": compactadas}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aplica a política de retenção de analise_consumo")
+    parser.add_argument("--lote", type=int, default=settings.analises_lote_manutencao)
+    args = parser.parse_args()
+    
+    executar(args.lote)
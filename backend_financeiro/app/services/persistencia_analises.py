@@ -0,0 +1,175 @@
+"""Persistência assíncrona (write-behind) das análises em analise_consumo.
+
+Os endpoints de leitura só enfileiram a análise; uma thread de fundo agrupa os registros
+e grava cada lote com um único INSERT de várias linhas, fora do caminho da requisição.
+
+Análises idênticas à última gravada para o mesmo usuário e tipo são descartadas. A
+comparação é feita só no banco, contra a coluna assinatura da última linha e sob um advisory
+lock por usuário: um cache local de assinaturas ficaria defasado quando outro worker grava.
+"""
+import hashlib
+import json
+import logging
+import queue
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, text
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.models import AnaliseConsumo
+
+logger = logging.getLogger(__name__)
+
+# Primeira chave dos advisory locks da fila; a segunda é o id do usuário
+_CLASSE_LOCK = 7011
+
+_TRAVAR_USUARIOS = text("""
+    SELECT pg_advisory_xact_lock(:classe, usuario_id)
+    FROM unnest(CAST(:usuarios AS INTEGER[])) AS u(usuario_id)
+    ORDER BY usuario_id
+""")
+
+_ULTIMAS_ASSINATURAS = text("""
+    SELECT k.usuario_id, k.tipo_analise, ultima.assinatura
+    FROM unnest(CAST(:usuarios AS INTEGER[]), CAST(:tipos AS TEXT[])) AS k(usuario_id, tipo_analise)
+    CROSS JOIN LATERAL (
+        SELECT a.assinatura
+        FROM analise_consumo a
+        WHERE a.usuario_id = k.usuario_id
+          AND a.tipo_analise = k.tipo_analise
+          AND a.tipo_analise <> 'precomputo'
+        ORDER BY a.data_criacao DESC, a.id DESC
+        LIMIT 1
+    ) ultima
+""")
+
+
+class FilaAnalises:
+    
+    def __init__(self, max_fila: int, max_lote: int, intervalo_segundos: float = 1.0):
+        self.max_lote = max_lote
+        self.intervalo_segundos = intervalo_segundos
+        self._fila: "queue.Queue[Dict]" = queue.Queue(maxsize=max_fila)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._parar = threading.Event()
+        # Os contadores são alterados pelas threads das requisições e pela thread de gravação
+        self._lock_contadores = threading.Lock()
+        self.contadores = {
+            "enfileiradas": 0,
+            "duplicadas": 0,
+            "descartadas_fila_cheia": 0,
+            "gravadas": 0,
+            "lotes": 0,
+            "erros": 0
+        }
+    
+    @staticmethod
+    def _assinatura(registro: Dict) -> str:
+        conteudo = json.dumps(
+            [registro["dados_analise"], registro["insights"], registro["recomendacoes"], str(registro["score_confianca"])],
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha1(conteudo.encode()).hexdigest()
+    
+    def _contar(self, **incrementos: int) -> None:
+        with self._lock_contadores:
+            for nome, quantidade in incrementos.items():
+                self.contadores[nome] += quantidade
+    
+    def enfileirar(self, registro: Dict) -> bool:
+        """Enfileira o registro com sua assinatura; retorna False se a fila estiver cheia"""
+        registro = {**registro, "assinatura": self._assinatura(registro)}
+        
+        try:
+            self._fila.put_nowait(registro)
+        except queue.Full:
+            self._contar(descartadas_fila_cheia=1)
+            logger.warning("Fila de análises cheia; análise descartada")
+            return False
+        self._contar(enfileiradas=1)
+        
+        self.iniciar()
+        return True
+    
+    def iniciar(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._executar, name="persistencia-analises", daemon=True)
+            self._thread.start()
+    
+    def parar(self, timeout: float = 10.0) -> None:
+        """Sinaliza a thread, grava o que restou na fila e aguarda o término"""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def _proximo_lote(self) -> List[Dict]:
+        try:
+            lote = [self._fila.get(timeout=self.intervalo_segundos)]
+        except queue.Empty:
+            return []
+        while len(lote) < self.max_lote:
+            try:
+                lote.append(self._fila.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+    
+    def _executar(self) -> None:
+        while not (self._parar.is_set() and self._fila.empty()):
+            lote = self._proximo_lote()
+            if lote:
+                self._gravar(lote)
+    
+    @staticmethod
+    def _sem_repetidas(db, lote: List[Dict]) -> List[Dict]:
+        """Remove do lote as análises iguais à última gravada (ou à anterior do próprio lote)"""
+        chaves = sorted({(r["usuario_id"], r["tipo_analise"]) for r in lote})
+        db.execute(_TRAVAR_USUARIOS, {
+            "classe": _CLASSE_LOCK,
+            "usuarios": sorted({usuario_id for usuario_id, _ in chaves})
+        })
+        ultimas = {
+            (linha.usuario_id, linha.tipo_analise): linha.assinatura
+            for linha in db.execute(_ULTIMAS_ASSINATURAS, {
+                "usuarios": [usuario_id for usuario_id, _ in chaves],
+                "tipos": [tipo for _, tipo in chaves]
+            })
+        }
+        novas = []
+        for registro in lote:
+            chave = (registro["usuario_id"], registro["tipo_analise"])
+            if ultimas.get(chave) == registro["assinatura"]:
+                continue
+            ultimas[chave] = registro["assinatura"]
+            novas.append(registro)
+        return novas
+    
+    def _gravar(self, lote: List[Dict]) -> None:
+        db = SessionLocal()
+        try:
+            novas = self._sem_repetidas(db, lote)
+            if novas:
+                db.execute(insert(AnaliseConsumo).values(novas))
+            db.commit()
+            self._contar(gravadas=len(novas), duplicadas=len(lote) - len(novas), lotes=1)
+        except Exception:
+            db.rollback()
+            self._contar(erros=1)
+            logger.exception("Erro ao gravar lote de %s análises", len(lote))
+        finally:
+            db.close()
+    
+    def estatisticas(self) -> Dict:
+        with self._lock_contadores:
+            contadores = dict(self.contadores)
+        return {**contadores, "pendentes": self._fila.qsize()}
+
+
+fila_analises = FilaAnalises(settings.analises_fila_max, settings.analises_lote_max)
@@ -0,0 +1,109 @@
+"""Pré-cálculo em lote das previsões e alertas de todos os usuários ativos.
+
+Percorre os usuários ativos em lotes (paginação por id) e distribui os lotes em um
+pool de processos. Cada resultado é gravado em analise_consumo com o tipo 'precomputo'
+(fora do histórico exibido ao usuário), a versão dos dados usada e a data de referência; os
+endpoints /ml usam essa linha enquanto a versão dos dados do usuário não mudar.
+
+Uso (agendar via cron, por exemplo de madrugada):
+    python -m app.services.precomputo --lote 500 --processos 4
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from typing import Iterator, List
+
+from ..database import SessionLocal, engine
+from ..models.models import Usuario, AnaliseConsumo
+
+TIPO_PRECOMPUTO = 'precomputo'
+
+logger = logging.getLogger(__name__)
+
+
+def _inicializar_processo():
+    # Conexões herdadas do processo pai não podem ser reutilizadas após o fork
+    engine.dispose(close=False)
+
+
+def precomputar_lote(usuario_ids: List[int]) -> int:
+    from ml_service import AnaliseSnapshot, PrevisaoGastosService
+    
+    db = SessionLocal()
+    processados = 0
+    try:
+        for usuario_id in usuario_ids:
+            try:
+                snapshot = AnaliseSnapshot(db, usuario_id)
+                service = PrevisaoGastosService(db, usuario_id, snapshot)
+                resultado = service.calcular_sem_cache()
+                
+                db.add(AnaliseConsumo(
+                    usuario_id=usuario_id,
+                    periodo_inicio=snapshot.inicio_periodo,
+                    periodo_fim=snapshot.hoje,
+                    tipo_analise=TIPO_PRECOMPUTO,
+                    dados_analise={
+                        "origem": "precomputo",
+                        "versao_dados": snapshot.versao_dados,
+                        "data_referencia": str(snapshot.hoje),
+                        **resultado
+                    },
+                    insights=[alerta['mensagem'] for alerta in resultado['alertas']],
+                    recomendacoes=[],
+                    score_confianca=Decimal(str(resultado['previsao'].get('confianca', 0)))
+                ))
+                db.commit()
+                processados += 1
+            except Exception:
+                db.rollback()
+                logger.exception("Erro no pré-cálculo do usuário %s", usuario_id)
+    finally:
+        db.close()
+    
+    return processados
+
+
+def lotes_usuarios_ativos(tamanho_lote: int) -> Iterator[List[int]]:
+    db = SessionLocal()
+    try:
+        ultimo_id = 0
+        while True:
+            ids = [
+                linha.id for linha in db.query(Usuario.id).filter(
+                    Usuario.ativo == True,
+                    Usuario.id > ultimo_id
+                ).order_by(Usuario.id).limit(tamanho_lote).all()
+            ]
+            if not ids:
+                return
+            yield ids
+            ultimo_id = ids[-1]
+    finally:
+        db.close()
+
+
+def executar(tamanho_lote: int = 500, processos: int = None) -> int:
+    inicio = time.perf_counter()
+    total = 0
+    
+    with ProcessPoolExecutor(max_workers=processos, initializer=_inicializar_processo) as executor:
+        for processados in executor.map(precomputar_lote, lotes_usuarios_ativos(tamanho_lote)):
+            total += processados
+            logger.info("Pré-cálculo: %s usuários processados", total)
+    
+    logger.info("Pré-cálculo concluído: %s usuários em %.1fs", total, time.perf_counter() - inicio)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-calcula previsões e alertas dos usuários ativos")
+    parser.add_argument("--lote", type=int, default=500)
+    parser.add_argument("--processos", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    executar(args.lote, args.processos)
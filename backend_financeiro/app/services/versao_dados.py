@@ -0,0 +1,58 @@
+"""Versão dos dados de cada usuário.
+
+A versão fica na tabela versao_dados_usuario para valer entre workers e reinícios.
+Os handlers de transações chamam incrementar_versao na mesma transação da escrita;
+contas, metas e categorias do usuário são cobertas pelos eventos de mapper registrados ao
+importar este módulo. Categorias globais não têm dono e não alteram a versão de ninguém.
+Do cadastro do usuário só contam as colunas de CAMPOS_USUARIO_VERSIONADOS: trocas de senha
+(inclusive o rehash no login) e de dados de perfil não invalidam caches nem ETags.
+"""
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..models.models import VersaoDadosUsuario, Categoria, ContaBancaria, Meta, Usuario
+
+# Colunas de Usuario que afetam as respostas versionadas (análises e listagens)
+CAMPOS_USUARIO_VERSIONADOS = ("moeda_padrao", "ativo")
+
+
+def _instrucao_incremento(usuario_id: int):
+    instrucao = insert(VersaoDadosUsuario).values(usuario_id=usuario_id, versao=1)
+    return instrucao.on_conflict_do_update(
+        index_elements=[VersaoDadosUsuario.usuario_id],
+        set_={
+            "versao": VersaoDadosUsuario.versao + 1,
+            "data_atualizacao": func.now()
+        }
+    )
+
+
+def incrementar_versao(db: Session, usuario_id: int) -> None:
+    """Incrementa a versão dos dados do usuário; efetivada junto com o commit da escrita"""
+    db.execute(_instrucao_incremento(usuario_id))
+
+
+def obter_versao(db: Session, usuario_id: int) -> int:
+    versao = db.execute(
+        select(VersaoDadosUsuario.versao).where(VersaoDadosUsuario.usuario_id == usuario_id)
+    ).scalar()
+    return versao or 0
+
+
+def _incrementar_em_flush(mapper, connection, alvo):
+    if alvo.usuario_id is not None:
+        connection.execute(_instrucao_incremento(alvo.usuario_id))
+
+
+def _incrementar_usuario_em_flush(mapper, connection, alvo):
+    estado = inspect(alvo)
+    if any(estado.attrs[campo].history.has_changes() for campo in CAMPOS_USUARIO_VERSIONADOS):
+        connection.execute(_instrucao_incremento(alvo.id))
+
+
+for _modelo in (ContaBancaria, Meta, Categoria):
+    for _evento in ("after_insert", "after_update", "after_delete"):
+        event.listen(_modelo, _evento, _incrementar_em_flush)
+
+event.listen(Usuario, "after_update", _incrementar_usuario_em_flush)
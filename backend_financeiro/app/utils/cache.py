@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional
+
+
+class CacheLRU:
+    """Cache em memória com tamanho máximo, remoção LRU e contadores de acerto/erro.
+    
+    Com ttl_segundos, cada entrada também expira esse tempo depois de definida.
+    """
+    
+    def __init__(self, max_entradas: int, ttl_segundos: Optional[float] = None):
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self._dados: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._expiracao: Dict[Hashable, float] = {}
+        self._lock = Lock()
+        self.acertos = 0
+        self.erros = 0
+        self.remocoes = 0
+        self.expiracoes = 0
+    
+    def obter(self, chave: Hashable, padrao: Optional[Any] = None) -> Any:
+        with self._lock:
+            if chave in self._dados:
+                if self.ttl_segundos is not None and self._expiracao[chave] <= time.monotonic():
+                    del self._dados[chave]
+                    del self._expiracao[chave]
+                    self.expiracoes += 1
+                else:
+                    self._dados.move_to_end(chave)
+                    self.acertos += 1
+                    return self._dados[chave]
+            self.erros += 1
+            return padrao
+    
+    def definir(self, chave: Hashable, valor: Any) -> None:
+        with self._lock:
+            self._dados[chave] = valor
+            self._dados.move_to_end(chave)
+            if self.ttl_segundos is not None:
+                self._expiracao[chave] = time.monotonic() + self.ttl_segundos
+            while len(self._dados) > self.max_entradas:
+                chave_antiga, _ = self._dados.popitem(last=False)
+                self._expiracao.pop(chave_antiga, None)
+                self.remocoes += 1
+    
+    def remover(self, chave: Hashable) -> None:
+        with self._lock:
+            self._dados.pop(chave, None)
+            self._expiracao.pop(chave, None)
+    
+    def limpar(self) -> None:
+        with self._lock:
+            self._dados.clear()
+            self._expiracao.clear()
+    
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            total = self.acertos + self.erros
+            return {
+                "entradas": len(self._dados),
+                "max_entradas": self.max_entradas,
+                "acertos": self.acertos,
+                "erros": self.erros,
+                "remocoes": self.remocoes,
+                "expiracoes": self.expiracoes,
+                "taxa_acerto": round(self.acertos / total, 4) if total else 0
+            }
@@ -0,0 +1,40 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Response, status
+
+from ..config import settings
+
+
+def etag_corresponde(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara o cabeçalho If-None-Match com o ETag atual (comparação fraca, aceita "*" e listas)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    atual = etag.removeprefix("W/")
+    return any(
+        candidato.strip().removeprefix("W/") == atual
+        for candidato in if_none_match.split(",")
+    )
+
+
+def nao_modificado(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def etag_versao(usuario_id: int, versao: int, *extras) -> str:
+    """ETag fraco a partir da versão dos dados do usuário.
+    
+    ETAG_EPOCA entra no valor para invalidar os ETags já emitidos quando um deploy muda o
+    formato das respostas. A versão deve ser lida antes dos dados: se uma escrita ocorrer
+    entre as duas leituras, o cliente só refaz a requisição seguinte.
+    """
+    partes = [settings.etag_epoca, str(usuario_id), str(versao), *(str(e) for e in extras)]
+    return f'W/"{"-".join(partes)}"'
+
+
+def etag_conteudo(*valores) -> str:
+    """ETag fraco a partir de um hash dos valores, para respostas montadas sem consulta ao banco"""
+    conteudo = "\x1f".join([settings.etag_epoca, *(str(v) for v in valores)])
+    return f'W/"{hashlib.sha1(conteudo.encode("utf-8")).hexdigest()[:16]}"'
@@ -0,0 +1,19 @@
+"""Serialização JSON com orjson para respostas grandes montadas direto de linhas do banco.
+
+Gera os mesmos bytes que o caminho padrão do FastAPI (modelo Pydantic + JSONResponse): o orjson
+escreve date/datetime no mesmo formato ISO e, com OPT_UTC_Z, usa "Z" para UTC como o Pydantic.
+Decimal não é serializado nativamente; converta antes, como fazem os field_serializer dos schemas.
+"""
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi import Response
+
+
+def json_bytes(conteudo: Any) -> bytes:
+    return orjson.dumps(conteudo, option=orjson.OPT_UTC_Z)
+
+
+def resposta_json(conteudo: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Resposta pronta: o FastAPI não valida pelo response_model nem recodifica o conteúdo"""
+    return Response(content=json_bytes(conteudo), media_type="application/json", headers=headers)
@@ -0,0 +1,23 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List
+
+
+def codificar_cursor(*valores: Any) -> str:
+    """Codifica a chave da última linha da página em um cursor opaco"""
+    normalizados = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in valores]
+    bruto = json.dumps(normalizados, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> List[Any]:
+    """Decodifica um cursor gerado por codificar_cursor; levanta ValueError se for inválido"""
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Cursor inválido") from e
+    if not isinstance(valores, list):
+        raise ValueError("Cursor inválido")
+    return valores
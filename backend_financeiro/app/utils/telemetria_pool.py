@@ -0,0 +1,98 @@
+"""Telemetria do pool de conexões do SQLAlchemy.
+
+Os eventos do pool (checkout, checkin, connect, invalidate) alimentam os contadores. O tempo
+de espera por uma conexão não tem evento próprio, então PoolMedido mede a chamada interna
+que entrega a conexão (incluindo a abertura de uma nova, quando necessária) e registra o
+resultado em um histograma. Com pool_size + max_overflow abaixo da concorrência dos workers,
+o histograma desloca para a direita e aparecem os esgotamentos (timeouts).
+"""
+import time
+from threading import Lock
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as TimeoutPool
+from sqlalchemy.pool import QueuePool
+
+# Limites superiores das faixas do histograma de espera, em milissegundos
+FAIXAS_ESPERA_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class TelemetriaPool:
+    def __init__(self):
+        self._lock = Lock()
+        self.checkouts = 0
+        self.conexoes_abertas = 0
+        self.invalidacoes = 0
+        self.invalidacoes_leves = 0
+        self.esgotamentos = 0
+        self._espera = [0] * (len(FAIXAS_ESPERA_MS) + 1)
+        self._espera_total_ms = 0.0
+        self._espera_max_ms = 0.0
+    
+    def registrar_espera(self, espera_ms: float) -> None:
+        with self._lock:
+            for indice, limite in enumerate(FAIXAS_ESPERA_MS):
+                if espera_ms <= limite:
+                    break
+            else:
+                indice = len(FAIXAS_ESPERA_MS)
+            self._espera[indice] += 1
+            self._espera_total_ms += espera_ms
+            self._espera_max_ms = max(self._espera_max_ms, espera_ms)
+    
+    def registrar_esgotamento(self) -> None:
+        with self._lock:
+            self.esgotamentos += 1
+    
+    def _contar(self, contador: str) -> None:
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+    
+    def instalar(self, engine) -> None:
+        event.listen(engine, "checkout", lambda *_: self._contar("checkouts"))
+        event.listen(engine, "connect", lambda *_: self._contar("conexoes_abertas"))
+        event.listen(engine, "invalidate", lambda *_: self._contar("invalidacoes"))
+        event.listen(engine, "soft_invalidate", lambda *_: self._contar("invalidacoes_leves"))
+    
+    def estatisticas(self, pool) -> Dict:
+        with self._lock:
+            medidas = sum(self._espera)
+            histograma = {f"<= {limite} ms": n for limite, n in zip(FAIXAS_ESPERA_MS, self._espera)}
+            histograma[f"> {FAIXAS_ESPERA_MS[-1]} ms"] = self._espera[-1]
+            dados = {
+                "checkouts": self.checkouts,
+                "conexoes_abertas": self.conexoes_abertas,
+                "invalidacoes": self.invalidacoes,
+                "invalidacoes_leves": self.invalidacoes_leves,
+                "esgotamentos": self.esgotamentos,
+                "espera_media_ms": round(self._espera_total_ms / medidas, 2) if medidas else 0,
+                "espera_max_ms": round(self._espera_max_ms, 2),
+                "espera_histograma": histograma,
+            }
+        if isinstance(pool, QueuePool):
+            dados.update({
+                "tamanho": pool.size(),
+                "em_uso": pool.checkedout(),
+                "ociosas": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "timeout_segundos": pool.timeout(),
+            })
+        return dados
+
+
+telemetria_pool = TelemetriaPool()
+
+
+class PoolMedido(QueuePool):
+    """QueuePool que registra quanto cada checkout esperou por uma conexão"""
+    
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexao = super()._do_get()
+        except TimeoutPool:
+            telemetria_pool.registrar_esgotamento()
+            raise
+        telemetria_pool.registrar_espera((time.perf_counter() - inicio) * 1000)
+        return conexao
@@ -0,0 +1,84 @@
+"""Utilitários compartilhados pelos benchmarks.
+
+Os benchmarks rodam contra o banco configurado em DATABASE_URL. Todos os dados
+sintéticos são criados dentro de uma transação que é desfeita (rollback) ao final,
+então nada fica gravado no banco.
+"""
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.models import Usuario, Categoria, ContaBancaria, Transacao
+
+
+def criar_usuario_temporario(db: Session, categorias: int = 8) -> Dict:
+    usuario = Usuario(
+        nome="Benchmark",
+        email=f"benchmark_{random.randint(0, 10**9)}@exemplo.com",
+        senha_hash="x",
+        ativo=True
+    )
+    db.add(usuario)
+    db.flush()
+    
+    conta = ContaBancaria(usuario_id=usuario.id, nome="Conta Benchmark", tipo="carteira", ativa=True)
+    db.add(conta)
+    
+    cats = [
+        Categoria(usuario_id=usuario.id, nome=f"Despesa {i}", tipo="despesa", ativo=True)
+        for i in range(categorias)
+    ]
+    cats.append(Categoria(usuario_id=usuario.id, nome="Receita", tipo="receita", ativo=True))
+    db.add_all(cats)
+    db.flush()
+    
+    return {
+        "usuario_id": usuario.id,
+        "conta_id": conta.id,
+        "categorias_despesa": [c.id for c in cats if c.tipo == "despesa"],
+        "categoria_receita": cats[-1].id
+    }
+
+
+def inserir_transacoes(db: Session, contexto: Dict, quantidade: int, dias: int = 365,
+                       proporcao_receitas: float = 0.1, semente: int = 42) -> None:
+    rnd = random.Random(semente)
+    hoje = date.today()
+    linhas = []
+    for _ in range(quantidade):
+        receita = rnd.random() < proporcao_receitas
+        linhas.append({
+            "usuario_id": contexto["usuario_id"],
+            "conta_id": contexto["conta_id"],
+            "categoria_id": contexto["categoria_receita"] if receita else rnd.choice(contexto["categorias_despesa"]),
+            "tipo": "receita" if receita else "despesa",
+            "valor": Decimal(f"{rnd.uniform(5, 500):.2f}"),
+            "descricao": "benchmark",
+            "data_transacao": hoje - timedelta(days=rnd.randint(1, dias)),
+            "efetivada": True,
+            "recorrente": False
+        })
+    for inicio in range(0, len(linhas), 5000):
+        db.execute(insert(Transacao), linhas[inicio:inicio + 5000])
+    db.flush()
+
+
+def medir(funcao: Callable, repeticoes: int = 20) -> Dict[str, float]:
+    """Executa a função várias vezes e retorna p50/p99/média em milissegundos"""
+    tempos: List[float] = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        "p50": statistics.median(tempos),
+        "p99": tempos[min(len(tempos) - 1, int(len(tempos) * 0.99))],
+        "media": statistics.mean(tempos)
+    }
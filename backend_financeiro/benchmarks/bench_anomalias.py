@@ -0,0 +1,73 @@
+"""Detecção de anomalias: laço por categoria (implementação anterior) x máscara vetorizada.
+
+Não usa banco: gera históricos sintéticos no formato de AnalisePadroes.obter_transacoes_periodo.
+
+Uso:
+    python -m benchmarks.bench_anomalias [--linhas 10000 100000 1000000] [--categorias 30]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.ml.analise_padroes import marcar_anomalias, METODOS_ANOMALIA
+
+
+def gerar_despesas(linhas: int, categorias: int, semente: int = 42) -> pd.DataFrame:
+    rnd = np.random.default_rng(semente)
+    categoria_id = rnd.integers(1, categorias + 1, size=linhas)
+    valor = rnd.lognormal(mean=4, sigma=0.6, size=linhas).round(2)
+    return pd.DataFrame({
+        'id': np.arange(linhas),
+        'valor': valor,
+        'categoria_id': pd.Categorical(categoria_id),
+        'categoria_nome': pd.Categorical([f"Categoria {c}" for c in categoria_id]),
+        'data': np.datetime64('2025-01-01') + rnd.integers(0, 90, size=linhas).astype('timedelta64[D]'),
+        'descricao': 'compra'
+    })
+
+
+def detectar_legado(despesas: pd.DataFrame) -> int:
+    total = 0
+    for categoria_id in despesas['categoria_id'].unique():
+        cat_data = despesas[despesas['categoria_id'] == categoria_id]
+        if len(cat_data) < 5:
+            continue
+        media = cat_data['valor'].mean()
+        desvio = cat_data['valor'].std()
+        if desvio == 0:
+            continue
+        for _, row in cat_data[cat_data['valor'] > media + 2 * desvio].iterrows():
+            total += 1
+    return total
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--categorias", type=int, default=30)
+    args = parser.parse_args()
+    
+    cabecalho = f"{'linhas':>9} | {'legado (ms)':>11} | " + " | ".join(f"{m + ' (ms)':>11}" for m in METODOS_ANOMALIA)
+    print(cabecalho)
+    for linhas in args.linhas:
+        despesas = gerar_despesas(linhas, args.categorias)
+        total_legado, t_legado = cronometrar(detectar_legado, despesas)
+        tempos = []
+        for metodo in METODOS_ANOMALIA:
+            anomalas, tempo = cronometrar(marcar_anomalias, despesas, metodo)
+            if metodo == 'zscore':
+                assert len(anomalas) == total_legado
+            tempos.append(tempo)
+        print(f"{linhas:>9} | {t_legado:>11.1f} | " + " | ".join(f"{t:>11.1f}" for t in tempos))
+
+
+if __name__ == "__main__":
+    main()
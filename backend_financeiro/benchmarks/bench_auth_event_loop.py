@@ -0,0 +1,110 @@
+"""Atraso do event loop durante autenticações concorrentes: consulta no loop x no threadpool.
+
+Dispara N chamadas concorrentes a get_current_usuario enquanto uma tarefa mede quanto cada
+asyncio.sleep(5 ms) atrasa além do previsto. Com a consulta executada direto no loop
+(implementação anterior), cada ida ao banco trava todas as requisições do worker; com
+run_in_threadpool o atraso fica próximo de zero. --atraso-ms acrescenta uma espera a cada
+consulta para simular um banco lento.
+
+O usuário temporário é efetivado (as consultas usam sessões independentes) e removido ao final.
+
+Uso:
+    python -m benchmarks.bench_auth_event_loop [--requisicoes 200] [--atraso-ms 20]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from jose import jwt
+from sqlalchemy import event, text
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models.models import Usuario
+from app.services.auth import create_access_token, get_current_usuario, get_usuario_by_email
+from benchmarks._dados import criar_usuario_temporario
+
+INTERVALO = 0.005
+
+
+async def get_current_usuario_legado(token: str, db):
+    """Implementação anterior: mesma validação, com a consulta bloqueando o event loop"""
+    payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+    return get_usuario_by_email(db, payload["sub"])
+
+
+async def autenticar(dependencia, token: str):
+    db = SessionLocal()
+    try:
+        await dependencia(token=token, db=db)
+    finally:
+        db.close()
+
+
+async def medir_atraso_loop(dependencia, token: str, requisicoes: int, concorrencia: int) -> dict:
+    atrasos = []
+    parar = asyncio.Event()
+    
+    async def monitor():
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            await asyncio.sleep(INTERVALO)
+            atrasos.append((time.perf_counter() - inicio - INTERVALO) * 1000)
+    
+    limite = asyncio.Semaphore(concorrencia)
+    
+    async def requisicao():
+        async with limite:
+            await autenticar(dependencia, token)
+    
+    tarefa_monitor = asyncio.create_task(monitor())
+    inicio = time.perf_counter()
+    await asyncio.gather(*(requisicao() for _ in range(requisicoes)))
+    duracao = time.perf_counter() - inicio
+    parar.set()
+    await tarefa_monitor
+    
+    atrasos.sort()
+    return {
+        "p50": statistics.median(atrasos),
+        "p99": atrasos[min(len(atrasos) - 1, int(len(atrasos) * 0.99))],
+        "max": atrasos[-1],
+        "req_s": requisicoes / duracao
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requisicoes", type=int, default=200)
+    parser.add_argument("--concorrencia", type=int, default=20)
+    parser.add_argument("--atraso-ms", type=float, default=0)
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    contexto = criar_usuario_temporario(db)
+    db.commit()
+    email = db.get(Usuario, contexto["usuario_id"]).email
+    token = create_access_token({"sub": email})
+    
+    if args.atraso_ms:
+        @event.listens_for(engine, "before_cursor_execute")
+        def _banco_lento(*_):
+            time.sleep(args.atraso_ms / 1000)
+    
+    try:
+        print(f"{'dependência':>22} | {'atraso p50 (ms)':>15} | {'p99 (ms)':>9} | {'máx (ms)':>9} | {'req/s':>8}")
+        for nome, dependencia in (("consulta no loop", get_current_usuario_legado),
+                                  ("run_in_threadpool", get_current_usuario)):
+            r = asyncio.run(medir_atraso_loop(dependencia, token, args.requisicoes, args.concorrencia))
+            print(f"{nome:>22} | {r['p50']:>15.2f} | {r['p99']:>9.2f} | {r['max']:>9.2f} | {r['req_s']:>8.1f}")
+    finally:
+        if args.atraso_ms:
+            event.remove(engine, "before_cursor_execute", _banco_lento)
+        db.execute(text("DELETE FROM usuario WHERE id = :id"), {"id": contexto["usuario_id"]})
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Latência de escrita de uma transação: caminho anterior x RETURNING com um único commit.
+
+O caminho anterior consultava a conta padrão, fazia commit e db.refresh() a cada inserção;
+o atual usa o cache da conta padrão, INSERT ... RETURNING e um commit. Como o custo do
+commit faz parte do que se mede, as escritas são efetivadas de verdade: o usuário temporário
+e suas transações são removidos ao final.
+
+Uso:
+    python -m benchmarks.bench_escrita_transacao [--repeticoes 500]
+"""
+import argparse
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.models import schemas
+from app.models.models import ContaBancaria, Transacao, Usuario
+from app.routes.transacoes import atualizar_transacao, criar_transacao, deletar_transacao
+from app.services.versao_dados import incrementar_versao
+from benchmarks._dados import criar_usuario_temporario, medir
+
+
+def criar_legado(transacao: schemas.TransacaoCreate, db, current_user):
+    conta_padrao = db.query(ContaBancaria).filter(
+        ContaBancaria.usuario_id == current_user.id,
+        ContaBancaria.ativa == True
+    ).first()
+    
+    db_transacao = Transacao(
+        usuario_id=current_user.id,
+        categoria_id=transacao.categoria_id,
+        conta_id=conta_padrao.id,
+        tipo=transacao.tipo,
+        valor=transacao.valor,
+        descricao=transacao.descricao,
+        data_transacao=transacao.data,
+        efetivada=transacao.efetivada,
+        observacoes=transacao.observacoes,
+        recorrente=False
+    )
+    db.add(db_transacao)
+    incrementar_versao(db, current_user.id)
+    db.commit()
+    db.refresh(db_transacao)
+    return db_transacao
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeticoes", type=int, default=500)
+    args = parser.parse_args()
+    
+    # Sem expirar no commit, como o usuário de uma requisição recém-carregado em get_current_usuario
+    db = SessionLocal(expire_on_commit=False)
+    contexto = criar_usuario_temporario(db)
+    db.commit()
+    usuario = db.get(Usuario, contexto["usuario_id"])
+    nova = schemas.TransacaoCreate(
+        descricao="benchmark",
+        valor=Decimal("42.50"),
+        tipo="despesa",
+        data=date.today(),
+        categoria_id=contexto["categorias_despesa"][0]
+    )
+    alteracao = schemas.TransacaoUpdate(valor=Decimal("10.00"))
+    
+    try:
+        ids = []
+        resultados = {
+            "inserir (anterior)": medir(lambda: criar_legado(nova, db, usuario), args.repeticoes),
+            "inserir (RETURNING)": medir(lambda: ids.append(criar_transacao(nova, db, usuario).id), args.repeticoes),
+            "atualizar": medir(lambda: atualizar_transacao(ids[-1], alteracao, db, usuario), args.repeticoes),
+            "excluir": medir(lambda: deletar_transacao(ids.pop(), db, usuario), min(args.repeticoes, len(ids))),
+        }
+        print(f"{'operação':>20} | {'p50 (ms)':>9} | {'p99 (ms)':>9} | {'média (ms)':>10}")
+        for nome, tempos in resultados.items():
+            print(f"{nome:>20} | {tempos['p50']:>9.2f} | {tempos['p99']:>9.2f} | {tempos['media']:>10.2f}")
+    finally:
+        db.rollback()
+        db.execute(text("DELETE FROM transacao WHERE usuario_id = :id"), {"id": contexto["usuario_id"]})
+        db.execute(text("DELETE FROM usuario WHERE id = :id"), {"id": contexto["usuario_id"]})
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Tempo de construção e memória do histórico em DataFrame: dicts por linha x carregador colunar.
+
+Não usa banco: gera linhas sintéticas no formato devolvido por cada caminho (objetos com
+Decimal/date para o legado, tuplas de inteiros para o colunar) e mede apenas a montagem.
+
+Uso:
+    python -m benchmarks.bench_historico_colunar [--linhas 100000]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pandas as pd
+
+from app.ml.historico_colunar import montar_frame, TIPOS
+
+
+def gerar_linhas(quantidade: int, semente: int = 42):
+    rnd = random.Random(semente)
+    hoje = date.today()
+    epoca = date(1970, 1, 1)
+    objetos, tuplas = [], []
+    for i in range(quantidade):
+        data = hoje - timedelta(days=rnd.randint(0, 365))
+        centavos = rnd.randint(100, 100000)
+        tipo = 'despesa' if rnd.random() < 0.9 else 'receita'
+        categoria_id = rnd.randint(1, 15)
+        objetos.append(SimpleNamespace(
+            id=i, tipo=tipo, valor=Decimal(centavos) / 100, data_transacao=data,
+            categoria_id=categoria_id, descricao='compra'
+        ))
+        tuplas.append(((data - epoca).days, centavos, TIPOS.index(tipo), categoria_id, i, 'compra'))
+    return objetos, tuplas
+
+
+def montar_legado(transacoes):
+    data = []
+    for t in transacoes:
+        data.append({
+            'id': t.id,
+            'tipo': t.tipo,
+            'valor': float(t.valor),
+            'data': t.data_transacao,
+            'categoria_id': t.categoria_id,
+            'descricao': t.descricao,
+            'dia_semana': t.data_transacao.weekday(),
+            'dia_mes': t.data_transacao.day,
+            'mes': t.data_transacao.month,
+            'ano': t.data_transacao.year
+        })
+    df = pd.DataFrame(data)
+    df['ano_mes'] = df['ano'].astype(str) + '-' + df['mes'].astype(str).str.zfill(2)
+    return df
+
+
+def medir(funcao, *args):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    df = funcao(*args)
+    tempo = (time.perf_counter() - inicio) * 1000
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return df, tempo, pico / 2**20, df.memory_usage(deep=True).sum() / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--linhas", type=int, default=100000)
+    args = parser.parse_args()
+    
+    objetos, tuplas = gerar_linhas(args.linhas)
+    
+    df_legado, t_legado, pico_legado, mem_legado = medir(montar_legado, objetos)
+    df_colunar, t_colunar, pico_colunar, mem_colunar = medir(montar_frame, tuplas, True, True)
+    
+    assert (df_legado['valor'].values == df_colunar['valor'].values).all()
+    assert (df_legado['dia_semana'].values == df_colunar['dia_semana'].values).all()
+    assert (df_legado['ano_mes'].values == df_colunar['ano_mes'].astype(str).values).all()
+    
+    print(f"{'caminho':>8} | {'tempo (ms)':>10} | {'pico alocado (MiB)':>18} | {'DataFrame (MiB)':>15}")
+    print(f"{'legado':>8} | {t_legado:>10.1f} | {pico_legado:>18.1f} | {mem_legado:>15.1f}")
+    print(f"{'colunar':>8} | {t_colunar:>10.1f} | {pico_colunar:>18.1f} | {mem_colunar:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
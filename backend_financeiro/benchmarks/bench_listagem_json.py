@@ -0,0 +1,83 @@
+"""Serialização da listagem de transações: ORM + Pydantic + json x tuplas + orjson.
+
+O caminho anterior carregava objetos ORM, validava cada um em schemas.Transacao
+(from_attributes), aplicava o field_serializer de valor e codificava com o json da
+biblioteca padrão, como o FastAPI faz com o response_model. O atual lê as colunas como
+tuplas e codifica com orjson. Antes de medir, o benchmark confere que os bytes das duas
+respostas são idênticos. Os dados são criados em uma transação desfeita ao final.
+
+Uso:
+    python -m benchmarks.bench_listagem_json [--transacoes 5000] [--limite 1000]
+"""
+import argparse
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.database import SessionLocal
+from app.models import schemas
+from app.models.models import Transacao
+from app.routes.transacoes import CAMPOS_LISTAGEM, transacoes_para_json
+from app.utils.json_rapido import json_bytes
+from benchmarks._dados import criar_usuario_temporario, inserir_transacoes, medir
+
+ADAPTADOR = TypeAdapter(List[schemas.Transacao])
+
+
+def listar_legado(db, usuario_id: int, limite: int) -> bytes:
+    transacoes = db.query(Transacao).filter(
+        Transacao.usuario_id == usuario_id
+    ).order_by(
+        Transacao.data_transacao.desc(),
+        Transacao.id.desc()
+    ).limit(limite).all()
+    validadas = ADAPTADOR.validate_python(transacoes, from_attributes=True)
+    return JSONResponse(jsonable_encoder(ADAPTADOR.dump_python(validadas, mode="json"))).body
+
+
+def listar_rapido(db, usuario_id: int, limite: int) -> bytes:
+    transacoes = db.query(
+        *(getattr(Transacao, campo) for campo in CAMPOS_LISTAGEM)
+    ).filter(
+        Transacao.usuario_id == usuario_id
+    ).order_by(
+        Transacao.data_transacao.desc(),
+        Transacao.id.desc()
+    ).limit(limite).all()
+    return json_bytes(transacoes_para_json(transacoes))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transacoes", type=int, default=5000)
+    parser.add_argument("--limite", type=int, default=1000)
+    parser.add_argument("--repeticoes", type=int, default=50)
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        contexto = criar_usuario_temporario(db)
+        inserir_transacoes(db, contexto, args.transacoes)
+        usuario_id = contexto["usuario_id"]
+        
+        legado = listar_legado(db, usuario_id, args.limite)
+        rapido = listar_rapido(db, usuario_id, args.limite)
+        assert legado == rapido, "as respostas dos dois caminhos diferem"
+        print(f"respostas idênticas: {len(rapido)} bytes, {args.limite} transações")
+        
+        resultados = {
+            "ORM + Pydantic + json": medir(lambda: listar_legado(db, usuario_id, args.limite), args.repeticoes),
+            "tuplas + orjson": medir(lambda: listar_rapido(db, usuario_id, args.limite), args.repeticoes),
+        }
+        print(f"{'caminho':>22} | {'p50 (ms)':>9} | {'p99 (ms)':>9} | {'média (ms)':>10}")
+        for nome, tempos in resultados.items():
+            print(f"{nome:>22} | {tempos['p50']:>9.2f} | {tempos['p99']:>9.2f} | {tempos['media']:>10.2f}")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
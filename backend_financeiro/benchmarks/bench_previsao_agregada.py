@@ -0,0 +1,76 @@
+"""Latência de PrevisaoGastosService.prever_gastos_proximos_30_dias x volume de transações.
+
+Compara o caminho antigo (carregar cada Transacao como objeto ORM, somar em Python e
+buscar cada Categoria individualmente) com a agregação GROUP BY feita no banco.
+
+Uso:
+    python -m benchmarks.bench_previsao_agregada [--tamanhos 100 1000 10000]
+"""
+import argparse
+import statistics
+from datetime import date, timedelta
+
+from sqlalchemy import and_
+
+from app.database import SessionLocal
+from app.models.models import Transacao, Categoria
+from ml_service import PrevisaoGastosService
+from benchmarks._dados import criar_usuario_temporario, inserir_transacoes, medir
+
+
+def previsao_legada(db, usuario_id):
+    hoje = date.today()
+    transacoes = db.query(Transacao).filter(
+        and_(
+            Transacao.usuario_id == usuario_id,
+            Transacao.tipo == 'despesa',
+            Transacao.data_transacao >= hoje - timedelta(days=90),
+            Transacao.data_transacao < hoje,
+            Transacao.efetivada == True
+        )
+    ).all()
+    
+    gastos_por_mes = {}
+    gastos_por_categoria = {}
+    for t in transacoes:
+        mes_ano = f"{t.data_transacao.year}-{t.data_transacao.month:02d}"
+        gastos_por_mes[mes_ano] = gastos_por_mes.get(mes_ano, 0) + float(t.valor)
+        gastos_por_categoria.setdefault(t.categoria_id, []).append(float(t.valor))
+    
+    for cat_id, valores in gastos_por_categoria.items():
+        categoria = db.query(Categoria).filter(Categoria.id == cat_id).first()
+        if categoria:
+            statistics.mean(valores)
+    
+    return statistics.mean(gastos_por_mes.values()) if gastos_por_mes else 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--repeticoes", type=int, default=10)
+    args = parser.parse_args()
+    
+    print(f"{'transacoes':>10} | {'legado p50 (ms)':>16} | {'agregado p50 (ms)':>18} | {'ganho':>6}")
+    for tamanho in args.tamanhos:
+        db = SessionLocal()
+        try:
+            contexto = criar_usuario_temporario(db, categorias=20)
+            inserir_transacoes(db, contexto, tamanho, dias=90, proporcao_receitas=0)
+            usuario_id = contexto["usuario_id"]
+            
+            legado = medir(lambda: (previsao_legada(db, usuario_id), db.expunge_all()), args.repeticoes)
+            agregado = medir(
+                lambda: PrevisaoGastosService(db, usuario_id).prever_gastos_proximos_30_dias(),
+                args.repeticoes
+            )
+            
+            print(f"{tamanho:>10} | {legado['p50']:>16.2f} | {agregado['p50']:>18.2f} | "
+                  f"{legado['p50'] / agregado['p50']:>5.1f}x")
+        finally:
+            db.rollback()
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
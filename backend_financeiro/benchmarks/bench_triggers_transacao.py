@@ -0,0 +1,133 @@
+"""Inserção em massa de transações: triggers por linha (002/005) x por instrução (009).
+
+Cria um usuário temporário com conta, orçamentos mensais e uma meta, insere N transações em
+massa com cada conjunto de triggers e compara o tempo e o estado resultante
+(saldo, orçamentos, meta e resumo mensal). A troca de triggers e todos os dados ficam dentro
+de uma transação desfeita ao final; como o DROP/CREATE TRIGGER bloqueia a tabela transacao
+até o rollback, rode contra um banco de desenvolvimento.
+
+Uso:
+    python -m benchmarks.bench_triggers_transacao [--tamanhos 1000 10000]
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.models.models import Meta, Orcamento, OrcamentoCategoria
+from benchmarks._dados import criar_usuario_temporario, inserir_transacoes
+
+TRIGGERS_POR_INSTRUCAO = [
+    "trigger_transacao_saldo_insert",
+    "trigger_transacao_saldo_update",
+    "trigger_transacao_saldo_delete",
+    "trigger_transacao_orcamento_insert",
+    "trigger_transacao_meta_insert",
+    "trigger_transacao_validar_categoria_insert",
+    "trigger_transacao_validar_categoria_update",
+    "trigger_transacao_resumo_insert",
+    "trigger_transacao_resumo_update",
+    "trigger_transacao_resumo_delete",
+]
+
+# (trigger, momento, função) como definidos em 002_create_triggers.sql e 005_resumo_mensal.sql
+TRIGGERS_POR_LINHA = [
+    ("trigger_transacao_insert_saldo", "AFTER INSERT", "atualizar_saldo_conta_insert"),
+    ("trigger_transacao_update_saldo", "AFTER UPDATE", "atualizar_saldo_conta_update"),
+    ("trigger_transacao_delete_saldo", "AFTER DELETE", "atualizar_saldo_conta_delete"),
+    ("trigger_transacao_orcamento", "AFTER INSERT", "atualizar_orcamento_gasto"),
+    ("trigger_meta_progresso", "AFTER INSERT", "atualizar_progresso_meta"),
+    ("trigger_validar_categoria", "BEFORE INSERT OR UPDATE", "validar_categoria_transacao"),
+    ("trigger_transacao_resumo_mensal", "AFTER INSERT OR UPDATE OR DELETE", "atualizar_resumo_mensal"),
+]
+
+
+def usar_triggers_por_linha(db):
+    for nome in TRIGGERS_POR_INSTRUCAO:
+        db.execute(text(f"DROP TRIGGER IF EXISTS {nome} ON transacao"))
+    for trigger, momento, funcao in TRIGGERS_POR_LINHA:
+        db.execute(text(
+            f"CREATE TRIGGER {trigger} {momento} ON transacao "
+            f"FOR EACH ROW EXECUTE FUNCTION {funcao}()"
+        ))
+
+
+def preparar_usuario(db) -> dict:
+    contexto = criar_usuario_temporario(db)
+    usuario_id = contexto["usuario_id"]
+    hoje = date.today()
+    for meses_atras in range(13):
+        ano, mes = divmod(hoje.year * 12 + hoje.month - 1 - meses_atras, 12)
+        orcamento = Orcamento(
+            usuario_id=usuario_id, nome="Benchmark", mes=mes + 1, ano=ano,
+            valor_total=1000000, valor_gasto=0, ativo=True
+        )
+        db.add(orcamento)
+        db.flush()
+        db.add_all([
+            OrcamentoCategoria(
+                orcamento_id=orcamento.id, categoria_id=categoria_id,
+                valor_limite=1000000, valor_gasto=0, alerta_percentual=100
+            )
+            for categoria_id in contexto["categorias_despesa"]
+        ])
+    db.add(Meta(
+        usuario_id=usuario_id, nome="Benchmark", valor_alvo=1000000000, valor_atual=0,
+        data_inicio=hoje - timedelta(days=400), data_fim=hoje + timedelta(days=30), status="ativa"
+    ))
+    db.flush()
+    return contexto
+
+
+def estado(db, usuario_id: int) -> tuple:
+    parametros = {"usuario_id": usuario_id}
+    consultas = [
+        "SELECT id, saldo_atual FROM conta_bancaria WHERE usuario_id = :usuario_id ORDER BY id",
+        "SELECT mes, ano, valor_gasto FROM orcamento WHERE usuario_id = :usuario_id ORDER BY ano, mes",
+        """SELECT o.ano, o.mes, oc.categoria_id, oc.valor_gasto
+           FROM orcamento_categoria oc JOIN orcamento o ON o.id = oc.orcamento_id
+           WHERE o.usuario_id = :usuario_id ORDER BY 1, 2, 3""",
+        "SELECT valor_atual, status FROM meta WHERE usuario_id = :usuario_id ORDER BY id",
+        """SELECT ano, mes, categoria_id, tipo, soma, quantidade, soma_quadrados
+           FROM resumo_mensal_categoria WHERE usuario_id = :usuario_id ORDER BY 1, 2, 3, 4""",
+    ]
+    return tuple(tuple(map(tuple, db.execute(text(c), parametros).all())) for c in consultas)
+
+
+def rodar(db, contexto: dict, quantidade: int) -> tuple:
+    inicio = time.perf_counter()
+    inserir_transacoes(db, contexto, quantidade, dias=360, proporcao_receitas=0.2)
+    tempo = (time.perf_counter() - inicio) * 1000
+    return tempo, estado(db, contexto["usuario_id"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        contexto = preparar_usuario(db)
+        print(f"{'transações':>10} | {'por linha (ms)':>14} | {'por instrução (ms)':>18} | {'ganho':>6}")
+        for quantidade in args.tamanhos:
+            ponto = db.begin_nested()
+            t_instrucao, estado_instrucao = rodar(db, contexto, quantidade)
+            ponto.rollback()
+            
+            ponto = db.begin_nested()
+            usar_triggers_por_linha(db)
+            t_linha, estado_linha = rodar(db, contexto, quantidade)
+            ponto.rollback()
+            
+            assert estado_linha == estado_instrucao, "triggers por linha e por instrução divergiram"
+            print(f"{quantidade:>10} | {t_linha:>14.1f} | {t_instrucao:>18.1f} | {t_linha / t_instrucao:>5.1f}x")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
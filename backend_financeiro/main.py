@@ -1,9 +1,15 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routes import auth, categorias, transacoes
 from app.database import engine, Base
 from app.routes import ml_routes
+from app.services import cache_previsoes
+from app.services.persistencia_analises import fila_analises
+from app.services.auth import cache_principais, exigir_token_metricas
+from app.services.hashing import pool_hashing
+from app.services.categorias import cache_categorias
+from app.utils.telemetria_pool import telemetria_pool
 
 app = FastAPI(
     title="API Financeiro",
@@ -40,6 +46,8 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     print("Encerrando API Financeiro...")
+    fila_analises.parar()
+    pool_hashing.parar()
 
 
 @app.get("/")
@@ -59,3 +67,15 @@ def health_check():
         "status": "healthy",
         "message": "API esta funcionando corretamente"
     }
+
+
+@app.get("/metricas", dependencies=[Depends(exigir_token_metricas)], include_in_schema=False)
+def metricas():
+    return {
+        "cache_previsoes": cache_previsoes.estatisticas(),
+        "persistencia_analises": fila_analises.estatisticas(),
+        "cache_principais": cache_principais.estatisticas(),
+        "hashing": pool_hashing.estatisticas(),
+        "cache_categorias": cache_categorias.estatisticas(),
+        "pool_banco": telemetria_pool.estatisticas(engine.pool)
+    }
@@ -3,33 +3,190 @@ from decimal import Decimal
 from typing import List, Dict, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, extract
+from functools import cached_property
 import statistics
 import json
 
 
-class PrevisaoGastosService:
+class AnaliseSnapshot:
+    """Dados do usuário carregados uma única vez e compartilhados por todas as análises da requisição"""
     
-    def __init__(self, db: Session, usuario_id: int):
+    def __init__(self, db: Session, usuario_id: int, hoje: Optional[date] = None):
         self.db = db
         self.usuario_id = usuario_id
+        self.hoje = hoje or date.today()
+        self.inicio_periodo = self.hoje - timedelta(days=90)
     
-    def prever_gastos_proximos_30_dias(self) -> Dict:
-        hoje = date.today()
-        inicio_periodo = hoje - timedelta(days=90)
+    @cached_property
+    def versao_dados(self) -> int:
+        from app.services.versao_dados import obter_versao
+        
+        return obter_versao(self.db, self.usuario_id)
+    
+    @cached_property
+    def analise_precomputada(self) -> Optional[Dict]:
+        """Resultados gravados pelo pré-cálculo em lote, se ainda válidos para a versão atual dos dados"""
+        from app.models.models import AnaliseConsumo
+        from app.services.precomputo import TIPO_PRECOMPUTO
+        
+        analise = self.db.query(AnaliseConsumo.dados_analise).filter(
+            and_(
+                AnaliseConsumo.usuario_id == self.usuario_id,
+                AnaliseConsumo.tipo_analise == TIPO_PRECOMPUTO
+            )
+        ).order_by(AnaliseConsumo.data_criacao.desc()).first()
+        
+        if analise is None:
+            return None
         
+        dados = analise.dados_analise
+        if dados.get('versao_dados') != self.versao_dados or dados.get('data_referencia') != str(self.hoje):
+            return None
+        
+        return dados
+    
+    @cached_property
+    def _despesas_por_mes(self) -> List[Tuple[int, int, bool, float, int]]:
+        """(ano, mes, anterior_a_hoje, total, quantidade) das despesas desde o início do período"""
+        from app.models.models import Transacao
+        
+        ano = extract('year', Transacao.data_transacao)
+        mes = extract('month', Transacao.data_transacao)
+        anterior_a_hoje = (Transacao.data_transacao < self.hoje)
+        
+        linhas = self.db.query(
+            ano.label('ano'),
+            mes.label('mes'),
+            anterior_a_hoje.label('anterior_a_hoje'),
+            func.sum(Transacao.valor).label('total'),
+            func.count(Transacao.id).label('quantidade')
+        ).filter(
+            and_(
+                Transacao.usuario_id == self.usuario_id,
+                Transacao.tipo == 'despesa',
+                Transacao.data_transacao >= self.inicio_periodo,
+                Transacao.efetivada == True
+            )
+        ).group_by(ano, mes, anterior_a_hoje).order_by(ano, mes).all()
+        
+        return [
+            (int(l.ano), int(l.mes), bool(l.anterior_a_hoje), float(l.total), int(l.quantidade))
+            for l in linhas
+        ]
+    
+    def gastos_por_mes(self, ate_mes_atual: bool = True) -> Tuple[Dict[str, float], int]:
+        """Totais mensais anteriores a hoje; com ate_mes_atual=False exclui o mês corrente"""
+        mes_atual = (self.hoje.year, self.hoje.month)
+        gastos = {}
+        quantidade_total = 0
+        for ano, mes, anterior_a_hoje, total, quantidade in self._despesas_por_mes:
+            if not anterior_a_hoje:
+                continue
+            if not ate_mes_atual and (ano, mes) >= mes_atual:
+                continue
+            chave = f"{ano}-{mes:02d}"
+            gastos[chave] = gastos.get(chave, 0) + total
+            quantidade_total += quantidade
+        return gastos, quantidade_total
+    
+    @cached_property
+    def gasto_mes_atual(self) -> float:
+        mes_atual = (self.hoje.year, self.hoje.month)
+        return sum(
+            total for ano, mes, _, total, _ in self._despesas_por_mes
+            if (ano, mes) >= mes_atual
+        )
+    
+    @cached_property
+    def gastos_por_categoria(self) -> List[Tuple[int, str, float, int]]:
+        """(categoria_id, nome, total, quantidade) das despesas do período, com o nome já unido"""
         from app.models.models import Transacao, Categoria
         
-        transacoes = self.db.query(Transacao).filter(
+        linhas = self.db.query(
+            Transacao.categoria_id,
+            Categoria.nome,
+            func.sum(Transacao.valor).label('total'),
+            func.count(Transacao.id).label('quantidade')
+        ).join(
+            Categoria, Categoria.id == Transacao.categoria_id
+        ).filter(
             and_(
                 Transacao.usuario_id == self.usuario_id,
                 Transacao.tipo == 'despesa',
-                Transacao.data_transacao >= inicio_periodo,
-                Transacao.data_transacao < hoje,
+                Transacao.data_transacao >= self.inicio_periodo,
+                Transacao.data_transacao < self.hoje,
                 Transacao.efetivada == True
             )
+        ).group_by(Transacao.categoria_id, Categoria.nome).all()
+        
+        return [
+            (l.categoria_id, l.nome, float(l.total), int(l.quantidade))
+            for l in linhas
+        ]
+    
+    @cached_property
+    def saldo_total(self) -> float:
+        from app.models.models import ContaBancaria
+        
+        saldo = self.db.query(func.sum(ContaBancaria.saldo_atual)).filter(
+            and_(
+                ContaBancaria.usuario_id == self.usuario_id,
+                ContaBancaria.ativa == True
+            )
+        ).scalar()
+        return float(saldo or 0)
+    
+    @cached_property
+    def metas_ativas(self) -> List:
+        from app.models.models import Meta
+        
+        return self.db.query(Meta).filter(
+            and_(
+                Meta.usuario_id == self.usuario_id,
+                Meta.status == 'ativa',
+                Meta.data_fim >= self.hoje
+            )
         ).all()
+
+
+class PrevisaoGastosService:
+    
+    def __init__(self, db: Session, usuario_id: int, snapshot: Optional[AnaliseSnapshot] = None):
+        self.db = db
+        self.usuario_id = usuario_id
+        self.snapshot = snapshot or AnaliseSnapshot(db, usuario_id)
+        self._previsao: Optional[Dict] = None
+    
+    def prever_gastos_proximos_30_dias(self) -> Dict:
+        if self._previsao is None:
+            self._previsao = self._em_cache('previsao', self._calcular_previsao)
+        return self._previsao
+    
+    def _em_cache(self, nome: str, calcular):
+        from app.services.cache_previsoes import obter_ou_calcular
         
-        if len(transacoes) < 5:
+        def calcular_ou_usar_precomputado():
+            precomputado = self.snapshot.analise_precomputada
+            if precomputado is not None and nome in precomputado:
+                return precomputado[nome]
+            return calcular()
+        
+        return obter_ou_calcular(
+            self.usuario_id, self.snapshot.versao_dados, self.snapshot.hoje, nome, calcular_ou_usar_precomputado
+        )
+    
+    def calcular_sem_cache(self) -> Dict:
+        """Calcula previsão e alertas ignorando caches e resultados pré-calculados"""
+        self._previsao = self._calcular_previsao()
+        return {
+            "previsao": self._previsao,
+            "alertas": self._calcular_alertas()
+        }
+    
+    def _calcular_previsao(self) -> Dict:
+        gastos_por_mes, total_transacoes = self.snapshot.gastos_por_mes()
+        
+        if total_transacoes < 5:
             return {
                 "previsao_total": 0,
                 "confianca": 0,
@@ -37,21 +194,6 @@ class PrevisaoGastosService:
                 "por_categoria": []
             }
         
-        gastos_por_mes = {}
-        gastos_por_categoria = {}
-        
-        for t in transacoes:
-            mes_ano = f"{t.data_transacao.year}-{t.data_transacao.month:02d}"
-            valor = float(getattr(t, 'valor', 0) if not hasattr(t.valor, 'type') else 0)
-            
-            if mes_ano not in gastos_por_mes:
-                gastos_por_mes[mes_ano] = 0
-            gastos_por_mes[mes_ano] += valor
-            
-            if t.categoria_id not in gastos_por_categoria:
-                gastos_por_categoria[t.categoria_id] = []
-            gastos_por_categoria[t.categoria_id].append(valor)
-        
         valores_mensais = list(gastos_por_mes.values())
         media_mensal = statistics.mean(valores_mensais)
         
@@ -62,17 +204,15 @@ class PrevisaoGastosService:
         else:
             confianca = 50
         
-        previsao_categorias = []
-        for cat_id, valores in gastos_por_categoria.items():
-            categoria = self.db.query(Categoria).filter(Categoria.id == cat_id).first()
-            if categoria:
-                media_cat = statistics.mean(valores)
-                previsao_categorias.append({
-                    "categoria_id": cat_id,
-                    "categoria_nome": categoria.nome,
-                    "previsao": round(media_cat, 2),
-                    "historico_transacoes": len(valores)
-                })
+        previsao_categorias = [
+            {
+                "categoria_id": cat_id,
+                "categoria_nome": nome,
+                "previsao": round(total / quantidade, 2),
+                "historico_transacoes": quantidade
+            }
+            for cat_id, nome, total, quantidade in self.snapshot.gastos_por_categoria
+        ]
         
         previsao_categorias.sort(key=lambda x: x['previsao'], reverse=True)
         
@@ -80,7 +220,7 @@ class PrevisaoGastosService:
             "previsao_total": round(media_mensal, 2),
             "confianca": round(confianca, 2),
             "periodo_analise_dias": 90,
-            "transacoes_analisadas": len(transacoes),
+            "transacoes_analisadas": total_transacoes,
             "por_categoria": previsao_categorias[:10],
             "tendencia": self._calcular_tendencia(valores_mensais)
         }
@@ -105,8 +245,10 @@ class PrevisaoGastosService:
             return "estavel"
     
     def gerar_alertas(self) -> List[Dict]:
+        return self._em_cache('alertas', self._calcular_alertas)
+    
+    def _calcular_alertas(self) -> List[Dict]:
         alertas = []
-        hoje = date.today()
         
         alerta_gasto_acima_media = self._verificar_gasto_acima_media()
         if alerta_gasto_acima_media:
@@ -123,47 +265,13 @@ class PrevisaoGastosService:
         return alertas
     
     def _verificar_gasto_acima_media(self) -> Optional[Dict]:
-        hoje = date.today()
-        inicio_mes = hoje.replace(day=1)
+        gastos_por_mes, total_historico = self.snapshot.gastos_por_mes(ate_mes_atual=False)
         
-        from app.models.models import Transacao
-        
-        gasto_mes_atual = self.db.query(func.sum(Transacao.valor)).filter(
-            and_(
-                Transacao.usuario_id == self.usuario_id,
-                Transacao.tipo == 'despesa',
-                Transacao.data_transacao >= inicio_mes,
-                Transacao.efetivada == True
-            )
-        ).scalar() or Decimal(0)
-        
-        inicio_periodo = hoje - timedelta(days=90)
-        transacoes_historico = self.db.query(Transacao).filter(
-            and_(
-                Transacao.usuario_id == self.usuario_id,
-                Transacao.tipo == 'despesa',
-                Transacao.data_transacao >= inicio_periodo,
-                Transacao.data_transacao < inicio_mes,
-                Transacao.efetivada == True
-            )
-        ).all()
-        
-        if len(transacoes_historico) < 5:
-            return None
-        
-        gastos_por_mes = {}
-        for t in transacoes_historico:
-            mes_ano = f"{t.data_transacao.year}-{t.data_transacao.month:02d}"
-            if mes_ano not in gastos_por_mes:
-                gastos_por_mes[mes_ano] = 0
-            valor = float(getattr(t, 'valor', 0) if not hasattr(t.valor, 'type') else 0)
-            gastos_por_mes[mes_ano] += valor
-        
-        if not gastos_por_mes:
+        if total_historico < 5 or not gastos_por_mes:
             return None
         
         media_mensal = statistics.mean(gastos_por_mes.values())
-        gasto_atual = float(gasto_mes_atual)
+        gasto_atual = self.snapshot.gasto_mes_atual
         
         if gasto_atual > media_mensal * 1.2:
             percentual = ((gasto_atual - media_mensal) / media_mensal * 100)
@@ -180,16 +288,7 @@ class PrevisaoGastosService:
         return None
     
     def _verificar_saldo_baixo(self) -> Optional[Dict]:
-        from app.models.models import ContaBancaria
-        
-        contas = self.db.query(ContaBancaria).filter(
-            and_(
-                ContaBancaria.usuario_id == self.usuario_id,
-                ContaBancaria.ativa == True
-            )
-        ).all()
-        
-        saldo_total = sum(float(getattr(c, 'saldo_atual', 0)) for c in contas)
+        saldo_total = self.snapshot.saldo_total
         
         previsao = self.prever_gastos_proximos_30_dias()
         gasto_previsto = previsao.get('previsao_total', 0)
@@ -209,20 +308,14 @@ class PrevisaoGastosService:
         return None
     
     def _verificar_metas_em_risco(self) -> List[Dict]:
-        from app.models.models import Meta
-        
         alertas = []
-        hoje = date.today()
+        hoje = self.snapshot.hoje
         
-        metas = self.db.query(Meta).filter(
-            and_(
-                Meta.usuario_id == self.usuario_id,
-                Meta.status == 'ativa',
-                Meta.data_fim >= hoje
-            )
-        ).all()
+        previsao = self.prever_gastos_proximos_30_dias()
+        gasto_previsto_mensal = previsao.get('previsao_total', 0)
+        economia_diaria_estimada = max(0, (3000 - gasto_previsto_mensal) / 30)
         
-        for meta in metas:
+        for meta in self.snapshot.metas_ativas:
             dias_restantes = (meta.data_fim - hoje).days
             if dias_restantes <= 0:
                 continue
@@ -233,11 +326,6 @@ class PrevisaoGastosService:
             
             valor_diario_necessario = valor_faltante / dias_restantes
             
-            previsao = self.prever_gastos_proximos_30_dias()
-            gasto_previsto_mensal = previsao.get('previsao_total', 0)
-            
-            economia_diaria_estimada = max(0, (3000 - gasto_previsto_mensal) / 30)
-            
             if valor_diario_necessario > economia_diaria_estimada * 1.5:
                 alertas.append({
                     "tipo": "meta_em_risco",
@@ -253,26 +341,17 @@ class PrevisaoGastosService:
         
         return alertas
     
-    def salvar_analise(self, tipo_analise: str, dados: Dict, insights: List[str], recomendacoes: List[str], score: float):
-        from app.models.models import AnaliseConsumo
-        
-        hoje = date.today()
-        inicio_periodo = hoje - timedelta(days=90)
-        
-        analise = AnaliseConsumo(
-            usuario_id=self.usuario_id,
-            periodo_inicio=inicio_periodo,
-            periodo_fim=hoje,
-            tipo_analise=tipo_analise,
-            dados_analise=dados,
-            insights=insights,
-            recomendacoes=recomendacoes,
-            score_confianca=Decimal(str(score))
-        )
-        
-        self.db.add(analise)
-        self.db.commit()
-        self.db.refresh(analise)
-        
-        return analise
-
+    def salvar_analise(self, tipo_analise: str, dados: Dict, insights: List[str], recomendacoes: List[str], score: float) -> bool:
+        """Enfileira a análise para gravação em lote fora da requisição; duplicatas são descartadas"""
+        from app.services.persistencia_analises import fila_analises
+        
+        return fila_analises.enfileirar({
+            "usuario_id": self.usuario_id,
+            "periodo_inicio": self.snapshot.inicio_periodo,
+            "periodo_fim": self.snapshot.hoje,
+            "tipo_analise": tipo_analise,
+            "dados_analise": dados,
+            "insights": insights,
+            "recomendacoes": recomendacoes,
+            "score_confianca": Decimal(str(score))
+        })
@@ -0,0 +1,98 @@
+import pandas as pd
+import pytest
+
+from app.ml.analise_padroes import METODOS_ANOMALIA, marcar_anomalias
+
+
+def _despesas(*grupos):
+    """Monta o DataFrame de despesas a partir de pares (categoria_id, valores)"""
+    linhas = [
+        (categoria_id, valor)
+        for categoria_id, valores in grupos
+        for valor in valores
+    ]
+    df = pd.DataFrame(linhas, columns=['categoria_id', 'valor'])
+    df['id'] = range(1, len(df) + 1)
+    return df
+
+
+def _ids_marcados(despesas, metodo, **kwargs):
+    return sorted(marcar_anomalias(despesas, metodo, **kwargs)['id'].tolist())
+
+
+def test_zscore_marca_valor_acima_de_dois_desvios():
+    despesas = _despesas((1, [10, 10, 10, 10, 10, 10, 10, 10, 10, 100]))
+    
+    anomalas = marcar_anomalias(despesas, 'zscore')
+    
+    assert anomalas['id'].tolist() == [10]
+    assert anomalas['media_categoria'].iloc[0] == pytest.approx(19.0)
+
+
+def test_mad_marca_valores_que_o_zscore_deixa_passar():
+    despesas = _despesas((1, [10, 11, 12, 13, 14, 40, 45]))
+    
+    assert _ids_marcados(despesas, 'zscore') == []
+    assert _ids_marcados(despesas, 'mad') == [6, 7]
+
+
+def test_iqr_marca_valor_acima_de_q3():
+    despesas = _despesas((1, [10, 12, 14, 16, 18, 20, 60]))
+    
+    assert _ids_marcados(despesas, 'iqr') == [7]
+
+
+def test_limites_sao_calculados_por_categoria():
+    despesas = _despesas(
+        (1, [10, 10, 10, 10, 10, 10, 10, 10, 10, 100]),
+        (2, [100, 110, 90, 100, 105, 95, 100, 100, 100, 100]),
+    )
+    
+    anomalas = marcar_anomalias(despesas, 'zscore')
+    
+    assert anomalas['id'].tolist() == [10]
+    assert anomalas['categoria_id'].tolist() == [1]
+
+
+@pytest.mark.parametrize('metodo', METODOS_ANOMALIA)
+def test_variancia_zero_nao_marca_nada(metodo):
+    despesas = _despesas((1, [50, 50, 50, 50, 50, 50]))
+    
+    assert _ids_marcados(despesas, metodo) == []
+
+
+def test_mad_zero_ignora_categoria():
+    despesas = _despesas((1, [10, 10, 10, 10, 10, 11, 100]))
+    
+    assert _ids_marcados(despesas, 'mad') == []
+
+
+def test_iqr_zero_ignora_categoria():
+    despesas = _despesas((1, [10, 10, 10, 10, 10, 10, 100]))
+    
+    assert _ids_marcados(despesas, 'iqr') == []
+
+
+@pytest.mark.parametrize('metodo', METODOS_ANOMALIA)
+def test_categoria_com_uma_linha_nao_e_marcada(metodo):
+    despesas = _despesas(
+        (1, [10, 11, 12, 13, 14, 1000]),
+        (2, [5000]),
+    )
+    
+    anomalas = marcar_anomalias(despesas, metodo, minimo_por_categoria=1)
+    
+    assert 2 not in anomalas['categoria_id'].tolist()
+    assert anomalas['id'].tolist() == [6]
+
+
+@pytest.mark.parametrize('metodo', METODOS_ANOMALIA)
+def test_categoria_abaixo_do_minimo_e_ignorada(metodo):
+    despesas = _despesas((1, [10, 11, 12, 1000]))
+    
+    assert _ids_marcados(despesas, metodo) == []
+
+
+def test_metodo_invalido():
+    with pytest.raises(ValueError):
+        marcar_anomalias(_despesas((1, [10, 20])), 'percentil')
@@ -0,0 +1,196 @@
+import codecs
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.services.importacao import (
+    ErroLinha,
+    VALOR_MAXIMO,
+    _ler_data,
+    _ler_valor,
+    _normalizar_csv,
+    _normalizar_ofx,
+    _validar,
+    ler_csv,
+    ler_ofx,
+)
+
+
+@pytest.mark.parametrize('bruto, esperado', [
+    ('1234.56', Decimal('1234.56')),
+    ('1.234,56', Decimal('1234.56')),
+    ('1,234.56', Decimal('1234.56')),
+    ('R$ 1.234,56', Decimal('1234.56')),
+    ('-45,90', Decimal('-45.90')),
+    (' 10 ', Decimal('10')),
+])
+def test_ler_valor(bruto, esperado):
+    assert _ler_valor(bruto) == esperado
+
+
+@pytest.mark.parametrize('bruto', ['NaN', 'sNaN', 'Infinity', '-Inf', 'abc', '', None])
+def test_ler_valor_rejeita_nao_finitos_e_invalidos(bruto):
+    with pytest.raises(ErroLinha):
+        _ler_valor(bruto)
+
+
+def test_ler_data_aceita_iso_e_brasileiro():
+    assert _ler_data('2024-03-15') == date(2024, 3, 15)
+    assert _ler_data('15/03/2024') == date(2024, 3, 15)
+
+
+@pytest.mark.parametrize('bruto', ['2024-02-30', '03/15/2024', '15-03-2024', ''])
+def test_ler_data_invalida(bruto):
+    with pytest.raises(ErroLinha):
+        _ler_data(bruto)
+
+
+def test_ler_csv_com_ponto_e_virgula_e_cp1252():
+    conteudo = (
+        'Data;Descricao;Valor\r\n'
+        '2024-01-05;São João;-1.234,56\r\n'
+        '06/01/2024;Salário;5000,00\r\n'
+    ).encode('cp1252')
+    
+    linhas = list(ler_csv(io.BytesIO(conteudo)))
+    
+    assert [numero for numero, _ in linhas] == [2, 3]
+    assert linhas[0][1] == {'data': '2024-01-05', 'descricao': 'São João', 'valor': '-1.234,56'}
+    assert linhas[1][1]['descricao'] == 'Salário'
+
+
+def test_ler_csv_com_codificacao_mista_e_bom():
+    conteudo = (
+        codecs.BOM_UTF8
+        + 'data,descricao,valor\n'.encode('utf-8')
+        + '2024-01-05,Pão,10.50\n'.encode('utf-8')
+        + '2024-01-06,Açaí,12.00\n'.encode('cp1252')
+    )
+    
+    linhas = [campos for _, campos in ler_csv(io.BytesIO(conteudo))]
+    
+    assert [campos['descricao'] for campos in linhas] == ['Pão', 'Açaí']
+
+
+def test_normalizar_csv():
+    campos = {'data': '05/01/2024', 'descricao': ' Mercado ', 'valor': '-1.234,56', 'efetivada': 'nao'}
+    
+    linha = _normalizar_csv(campos, categoria_padrao=7)
+    
+    assert linha == {
+        'categoria_id': 7,
+        'tipo': 'despesa',
+        'valor': Decimal('1234.56'),
+        'descricao': 'Mercado',
+        'data': date(2024, 1, 5),
+        'efetivada': False,
+        'observacoes': None,
+    }
+
+
+def test_normalizar_csv_com_data_invalida():
+    with pytest.raises(ErroLinha):
+        _normalizar_csv({'data': '31/02/2024', 'valor': '10'}, categoria_padrao=1)
+
+
+def test_normalizar_csv_com_categoria_invalida():
+    with pytest.raises(ErroLinha):
+        _normalizar_csv({'data': '2024-01-01', 'valor': '10', 'categoria_id': 'x'}, categoria_padrao=1)
+
+
+def test_validar():
+    categorias = {1: 'despesa', 2: 'receita'}
+    linha = {'tipo': 'despesa', 'categoria_id': 1, 'valor': Decimal('10')}
+    
+    _validar(linha, categorias)
+    
+    for alteracao in (
+        {'tipo': 'transferencia'},
+        {'categoria_id': None},
+        {'categoria_id': 3},
+        {'categoria_id': 2},
+        {'valor': Decimal('0')},
+        {'valor': VALOR_MAXIMO + 1},
+    ):
+        with pytest.raises(ErroLinha):
+            _validar({**linha, **alteracao}, categorias)
+
+
+OFX_SGML = """OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+ENCODING:USASCII
+CHARSET:1252
+
+<OFX>
+<BANKMSGSRSV1><STMTTRNRS><STMTRS>
+<BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240105120000[-3:BRT]
+<TRNAMT>-150.25
+<FITID>0001
+<MEMO>Padaria São Jorge
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240110
+<TRNAMT>3200.00
+<FITID>0002
+<NAME>Salario &amp; bonus
+</STMTTRN>
+</BANKTRANLIST>
+</STMTRS></STMTTRNRS></BANKMSGSRSV1>
+</OFX>
+"""
+
+
+def test_ler_ofx_sgml_cp1252():
+    linhas = list(ler_ofx(io.BytesIO(OFX_SGML.encode('cp1252'))))
+    
+    assert [numero for numero, _ in linhas] == [1, 2]
+    assert linhas[0][1]['MEMO'] == 'Padaria São Jorge'
+    assert linhas[1][1]['NAME'] == 'Salario & bonus'
+    
+    primeira = _normalizar_ofx(linhas[0][1], categoria_padrao=4)
+    assert primeira == {
+        'categoria_id': 4,
+        'tipo': 'despesa',
+        'valor': Decimal('150.25'),
+        'descricao': 'Padaria São Jorge',
+        'data': date(2024, 1, 5),
+        'efetivada': True,
+        'observacoes': 'FITID 0001',
+    }
+    
+    segunda = _normalizar_ofx(linhas[1][1], categoria_padrao=4)
+    assert segunda['tipo'] == 'receita'
+    assert segunda['descricao'] == 'Salario & bonus'
+
+
+def test_ler_ofx_xml_maior_que_um_bloco():
+    transacao = (
+        '<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>20240105</DTPOSTED>'
+        '<TRNAMT>-{i}.00</TRNAMT><FITID>{i}</FITID><MEMO>Compra {i}</MEMO></STMTTRN>\n'
+    )
+    conteudo = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n<OFX><BANKTRANLIST>\n'
+        + ''.join(transacao.format(i=i) for i in range(1, 1501))
+        + '</BANKTRANLIST></OFX>\n'
+    ).encode('utf-8')
+    assert len(conteudo) > 65536
+    
+    linhas = list(ler_ofx(io.BytesIO(conteudo)))
+    
+    assert len(linhas) == 1500
+    assert all(campos['FITID'] == str(numero) for numero, campos in linhas)
+    assert all(campos['MEMO'] == f'Compra {numero}' for numero, campos in linhas)
+
+
+def test_normalizar_ofx_com_valor_ou_data_invalidos():
+    with pytest.raises(ErroLinha):
+        _normalizar_ofx({'TRNAMT': 'NaN', 'DTPOSTED': '20240105'}, categoria_padrao=1)
+    with pytest.raises(ErroLinha):
+        _normalizar_ofx({'TRNAMT': '-10.00', 'DTPOSTED': '2024-01-05'}, categoria_padrao=1)
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from app.ml.tendencia import ajustar_tendencias, empacotar_series, prever_proximo_ponto
+
+
+SERIES = [
+    [100.0, 120.0, 135.0, 160.0, 170.0, 195.0],
+    [80.0, 60.0, 75.0, 50.0],
+    [10.0, 30.0, 20.0],
+    [300.0, 310.0],
+]
+
+
+def _r2_referencia(serie):
+    x = np.arange(len(serie), dtype=np.float64)
+    y = np.asarray(serie, dtype=np.float64)
+    inclinacao, intercepto = np.polyfit(x, y, 1)
+    ajustado = intercepto + inclinacao * x
+    ss_res = ((y - ajustado) ** 2).sum()
+    ss_tot = ((y - y.mean()) ** 2).sum()
+    return inclinacao, intercepto, 1 - ss_res / ss_tot
+
+
+def test_empacotar_series_alinha_a_esquerda():
+    valores, mascara = empacotar_series([[1.0, 2.0, 3.0], [4.0]])
+    
+    np.testing.assert_array_equal(valores, [[1.0, 2.0, 3.0], [4.0, 0.0, 0.0]])
+    np.testing.assert_array_equal(mascara, [[True, True, True], [True, False, False]])
+
+
+def test_ajuste_confere_com_polyfit():
+    valores, mascara = empacotar_series(SERIES)
+    ajuste = ajustar_tendencias(valores, mascara)
+    
+    for i, serie in enumerate(SERIES):
+        inclinacao, intercepto, r2 = _r2_referencia(serie)
+        assert ajuste['inclinacao'][i] == pytest.approx(inclinacao)
+        assert ajuste['intercepto'][i] == pytest.approx(intercepto)
+        assert ajuste['r2'][i] == pytest.approx(r2)
+        assert ajuste['pontos'][i] == len(serie)
+
+
+def test_reta_perfeita_tem_r2_um():
+    valores, mascara = empacotar_series([[5.0, 7.0, 9.0, 11.0]])
+    ajuste = ajustar_tendencias(valores, mascara)
+    
+    assert ajuste['inclinacao'][0] == pytest.approx(2.0)
+    assert ajuste['intercepto'][0] == pytest.approx(5.0)
+    assert ajuste['r2'][0] == pytest.approx(1.0)
+
+
+def test_serie_constante_tem_r2_um():
+    valores, mascara = empacotar_series([[50.0, 50.0, 50.0]])
+    ajuste = ajustar_tendencias(valores, mascara)
+    
+    assert ajuste['inclinacao'][0] == pytest.approx(0.0)
+    assert ajuste['intercepto'][0] == pytest.approx(50.0)
+    assert ajuste['r2'][0] == 1.0
+
+
+def test_serie_com_um_ponto_nao_tem_inclinacao():
+    valores, mascara = empacotar_series([[42.0], [1.0, 2.0]])
+    ajuste = ajustar_tendencias(valores, mascara)
+    
+    assert np.isnan(ajuste['inclinacao'][0])
+    assert ajuste['pontos'][0] == 1
+    assert ajuste['inclinacao'][1] == pytest.approx(1.0)
+
+
+def test_previsao_dentro_do_limite_segue_a_reta():
+    valores, mascara = empacotar_series([[100.0, 110.0, 120.0, 130.0]])
+    resultado = prever_proximo_ponto(valores, mascara)
+    
+    assert resultado['previsao'][0] == pytest.approx(140.0)
+    assert resultado['confianca'][0] == 100
+
+
+def test_previsao_fora_do_limite_usa_media_dos_ultimos_tres():
+    serie = [1000.0, 800.0, 600.0, 400.0, 200.0, 100.0]
+    valores, mascara = empacotar_series([serie])
+    resultado = prever_proximo_ponto(valores, mascara)
+    
+    inclinacao, intercepto, r2 = _r2_referencia(serie)
+    previsao_reta = intercepto + inclinacao * len(serie)
+    media_ultimos = np.mean(serie[-3:])
+    assert abs(previsao_reta - media_ultimos) / media_ultimos > 0.5
+    
+    assert resultado['previsao'][0] == pytest.approx(media_ultimos)
+    assert resultado['confianca'][0] == max(int(r2 * 100) - 20, 30)
+
+
+def test_confianca_minima_apos_limite_e_trinta():
+    serie = [500.0, 10.0, 100.0, 10.0, 100.0, 10.0]
+    valores, mascara = empacotar_series([serie])
+    resultado = prever_proximo_ponto(valores, mascara)
+    
+    _, _, r2 = _r2_referencia(serie)
+    assert int(r2 * 100) - 20 < 30
+    assert resultado['previsao'][0] == pytest.approx(np.mean(serie[-3:]))
+    assert resultado['confianca'][0] == 30
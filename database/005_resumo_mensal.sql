@@ -0,0 +1,93 @@
+-- Agregado mensal de transações efetivadas por usuário, mês, categoria e tipo.
+-- Mantido incrementalmente por trigger; as análises de ML leem daqui em vez de
+-- reagregar a tabela transacao a cada requisição.
+CREATE TABLE IF NOT EXISTS resumo_mensal_categoria (
+    usuario_id INTEGER NOT NULL REFERENCES usuario(id) ON DELETE CASCADE,
+    ano INTEGER NOT NULL,
+    mes INTEGER NOT NULL CHECK (mes BETWEEN 1 AND 12),
+    categoria_id INTEGER NOT NULL REFERENCES categorias(id) ON DELETE CASCADE,
+    tipo VARCHAR(10) NOT NULL,
+    soma DECIMAL(15,2) NOT NULL DEFAULT 0,
+    quantidade INTEGER NOT NULL DEFAULT 0,
+    soma_quadrados DECIMAL(30,4) NOT NULL DEFAULT 0,
+    CONSTRAINT pk_resumo_mensal_categoria PRIMARY KEY (usuario_id, ano, mes, categoria_id, tipo)
+);
+
+-- Aplica a contribuição (sinal +1 ou -1) de uma transação ao agregado
+CREATE OR REPLACE FUNCTION aplicar_resumo_mensal(
+    p_usuario_id INTEGER,
+    p_data DATE,
+    p_categoria_id INTEGER,
+    p_tipo VARCHAR,
+    p_valor DECIMAL,
+    p_sinal INTEGER
+)
+RETURNS VOID AS $$
+DECLARE
+    v_ano INTEGER := EXTRACT(YEAR FROM p_data);
+    v_mes INTEGER := EXTRACT(MONTH FROM p_data);
+BEGIN
+    INSERT INTO resumo_mensal_categoria AS r
+        (usuario_id, ano, mes, categoria_id, tipo, soma, quantidade, soma_quadrados)
+    VALUES
+        (p_usuario_id, v_ano, v_mes, p_categoria_id, p_tipo,
+         p_sinal * p_valor, p_sinal, p_sinal * p_valor * p_valor)
+    ON CONFLICT (usuario_id, ano, mes, categoria_id, tipo) DO UPDATE
+    SET soma = r.soma + EXCLUDED.soma,
+        quantidade = r.quantidade + EXCLUDED.quantidade,
+        soma_quadrados = r.soma_quadrados + EXCLUDED.soma_quadrados;
+    
+    DELETE FROM resumo_mensal_categoria
+    WHERE usuario_id = p_usuario_id
+      AND ano = v_ano
+      AND mes = v_mes
+      AND categoria_id = p_categoria_id
+      AND tipo = p_tipo
+      AND quantidade <= 0;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION atualizar_resumo_mensal()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.efetivada = TRUE THEN
+        PERFORM aplicar_resumo_mensal(OLD.usuario_id, OLD.data_transacao, OLD.categoria_id, OLD.tipo, OLD.valor, -1);
+    END IF;
+    
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.efetivada = TRUE THEN
+        PERFORM aplicar_resumo_mensal(NEW.usuario_id, NEW.data_transacao, NEW.categoria_id, NEW.tipo, NEW.valor, 1);
+    END IF;
+    
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger e carga inicial na mesma transação, bloqueando escritas em transacao
+-- para que nenhuma linha fique fora do agregado ou seja contada duas vezes
+BEGIN;
+LOCK TABLE transacao IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS trigger_transacao_resumo_mensal ON transacao;
+CREATE TRIGGER trigger_transacao_resumo_mensal
+    AFTER INSERT OR UPDATE OR DELETE ON transacao
+    FOR EACH ROW
+    EXECUTE FUNCTION atualizar_resumo_mensal();
+
+TRUNCATE resumo_mensal_categoria;
+INSERT INTO resumo_mensal_categoria
+    (usuario_id, ano, mes, categoria_id, tipo, soma, quantidade, soma_quadrados)
+SELECT usuario_id,
+       EXTRACT(YEAR FROM data_transacao)::INTEGER,
+       EXTRACT(MONTH FROM data_transacao)::INTEGER,
+       categoria_id,
+       tipo,
+       SUM(valor),
+       COUNT(*),
+       SUM(valor * valor)
+FROM transacao
+WHERE efetivada = TRUE
+GROUP BY 1, 2, 3, 4, 5;
+
+COMMIT;
+
+COMMENT ON TABLE resumo_mensal_categoria IS 'Agregado mensal (soma, quantidade, soma dos quadrados) das transações efetivadas';
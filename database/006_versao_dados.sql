@@ -0,0 +1,9 @@
+-- Versão dos dados de cada usuário, incrementada pela API a cada escrita em
+-- transações, contas e metas. Usada como chave dos caches de análises.
+CREATE TABLE IF NOT EXISTS versao_dados_usuario (
+    usuario_id INTEGER PRIMARY KEY REFERENCES usuario(id) ON DELETE CASCADE,
+    versao BIGINT NOT NULL DEFAULT 0,
+    data_atualizacao TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE versao_dados_usuario IS 'Versão monotônica dos dados de cada usuário para invalidação de cache';
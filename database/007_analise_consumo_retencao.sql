@@ -0,0 +1,13 @@
+-- Índice para a paginação por cursor de /ml/historico-analises (usuario_id, data_criacao, id)
+-- e para a compactação por usuário. CONCURRENTLY evita bloquear escritas durante a criação;
+-- por isso este script não deve ser executado dentro de uma transação.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_analise_usuario_data
+    ON analise_consumo(usuario_id, data_criacao DESC, id DESC);
+
+-- Índice para a expiração por idade (manutencao_analises): cada lote do DELETE lê as
+-- linhas mais antigas que o limite de retenção por faixa de data_criacao, sem varrer a tabela
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_analise_data_criacao
+    ON analise_consumo(data_criacao);
+
+-- O índice composto cobre as consultas que usavam apenas usuario_id
+DROP INDEX CONCURRENTLY IF EXISTS idx_analise_usuario;
@@ -0,0 +1,10 @@
+-- Estende idx_transacao_data_usuario com id para que a paginação por cursor de
+-- GET /api/transacoes ((data_transacao, id) < cursor) seja atendida por uma varredura de
+-- faixa no índice, com ordem estável entre transações do mesmo dia.
+-- CONCURRENTLY evita bloquear escritas; não execute este script dentro de uma transação.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transacao_data_usuario_id
+    ON transacao(usuario_id, data_transacao DESC, id DESC);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_transacao_data_usuario;
+
+ALTER INDEX idx_transacao_data_usuario_id RENAME TO idx_transacao_data_usuario;
@@ -0,0 +1,314 @@
+-- Substitui os triggers FOR EACH ROW de transacao por triggers FOR EACH STATEMENT com
+-- tabelas de transição (REFERENCING NEW/OLD TABLE). Em vez de um UPDATE por linha inserida
+-- em conta_bancaria, orcamento, meta e resumo_mensal_categoria, cada instrução aplica os
+-- deltas agregados por conta, orçamento, meta e mês em um único UPDATE/UPSERT.
+--
+-- As funções por linha de 002_create_triggers.sql e 005_resumo_mensal.sql continuam
+-- definidas (usadas por benchmarks/bench_triggers_transacao.py para comparação).
+-- Requer PostgreSQL 10+. Tabelas de transição exigem um trigger por evento.
+
+-- Saldo das contas: soma dos valores efetivados por conta (receita +, despesa -)
+CREATE OR REPLACE FUNCTION atualizar_saldo_conta_lote()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE conta_bancaria c
+        SET saldo_atual = c.saldo_atual + d.delta
+        FROM (
+            SELECT conta_id, SUM(CASE WHEN tipo = 'receita' THEN valor ELSE -valor END) AS delta
+            FROM novas
+            WHERE efetivada = TRUE AND tipo IN ('receita', 'despesa')
+            GROUP BY conta_id
+        ) d
+        WHERE c.id = d.conta_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE conta_bancaria c
+        SET saldo_atual = c.saldo_atual - d.delta
+        FROM (
+            SELECT conta_id, SUM(CASE WHEN tipo = 'receita' THEN valor ELSE -valor END) AS delta
+            FROM antigas
+            WHERE efetivada = TRUE AND tipo IN ('receita', 'despesa')
+            GROUP BY conta_id
+        ) d
+        WHERE c.id = d.conta_id;
+    ELSE
+        UPDATE conta_bancaria c
+        SET saldo_atual = c.saldo_atual + d.delta
+        FROM (
+            SELECT conta_id, SUM(delta) AS delta
+            FROM (
+                SELECT conta_id, CASE WHEN tipo = 'receita' THEN valor ELSE -valor END AS delta
+                FROM novas
+                WHERE efetivada = TRUE AND tipo IN ('receita', 'despesa')
+                UNION ALL
+                SELECT conta_id, CASE WHEN tipo = 'receita' THEN -valor ELSE valor END
+                FROM antigas
+                WHERE efetivada = TRUE AND tipo IN ('receita', 'despesa')
+            ) movimentos
+            GROUP BY conta_id
+            HAVING SUM(delta) <> 0
+        ) d
+        WHERE c.id = d.conta_id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Orçamento do mês: despesas efetivadas somadas por orçamento e por categoria do orçamento
+CREATE OR REPLACE FUNCTION atualizar_orcamento_gasto_lote()
+RETURNS TRIGGER AS $$
+BEGIN
+    WITH gastos AS (
+        SELECT o.id AS orcamento_id, n.categoria_id, SUM(n.valor) AS valor
+        FROM novas n
+        JOIN orcamento o
+          ON o.usuario_id = n.usuario_id
+         AND o.mes = EXTRACT(MONTH FROM n.data_transacao)
+         AND o.ano = EXTRACT(YEAR FROM n.data_transacao)
+         AND o.ativo = TRUE
+        WHERE n.tipo = 'despesa' AND n.efetivada = TRUE
+        GROUP BY o.id, n.categoria_id
+    ),
+    por_orcamento AS (
+        UPDATE orcamento o
+        SET valor_gasto = o.valor_gasto + t.valor
+        FROM (
+            SELECT orcamento_id, SUM(valor) AS valor
+            FROM gastos
+            GROUP BY orcamento_id
+        ) t
+        WHERE o.id = t.orcamento_id
+    )
+    UPDATE orcamento_categoria oc
+    SET valor_gasto = oc.valor_gasto + g.valor
+    FROM gastos g
+    WHERE oc.orcamento_id = g.orcamento_id
+      AND oc.categoria_id = g.categoria_id;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Progresso das metas. Como no trigger por linha, uma meta deixa de receber valores
+-- depois que a soma acumulada (na ordem de inserção) atinge o valor restante.
+CREATE OR REPLACE FUNCTION atualizar_progresso_meta_lote()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE meta m
+    SET valor_atual = m.valor_atual + r.valor
+    FROM (
+        SELECT meta_id, SUM(valor) AS valor
+        FROM (
+            SELECT m.id AS meta_id,
+                   n.valor,
+                   m.valor_alvo - COALESCE(m.valor_atual, 0) AS restante,
+                   COALESCE(SUM(n.valor) OVER (
+                       PARTITION BY m.id
+                       ORDER BY n.id
+                       ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                   ), 0) AS acumulado_anterior
+            FROM novas n
+            JOIN meta m
+              ON m.usuario_id = n.usuario_id
+             AND m.status = 'ativa'
+             AND m.data_inicio <= n.data_transacao
+             AND m.data_fim >= n.data_transacao
+            WHERE n.tipo = 'receita' AND n.efetivada = TRUE
+        ) receitas
+        WHERE acumulado_anterior = 0 OR acumulado_anterior < restante
+        GROUP BY meta_id
+    ) r
+    WHERE m.id = r.meta_id;
+
+    UPDATE meta
+    SET status = 'concluida'
+    WHERE usuario_id IN (SELECT DISTINCT usuario_id FROM novas)
+      AND status = 'ativa'
+      AND valor_atual >= valor_alvo;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Validação do tipo da categoria; a exceção desfaz a instrução inteira
+CREATE OR REPLACE FUNCTION validar_categoria_transacao_lote()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_tipo_transacao VARCHAR(10);
+    v_tipo_categoria VARCHAR(10);
+BEGIN
+    SELECT n.tipo, c.tipo INTO v_tipo_transacao, v_tipo_categoria
+    FROM novas n
+    JOIN categorias c ON c.id = n.categoria_id
+    WHERE c.tipo <> n.tipo
+    LIMIT 1;
+
+    IF FOUND THEN
+        RAISE EXCEPTION 'Tipo da transação (%) não corresponde ao tipo da categoria (%)', v_tipo_transacao, v_tipo_categoria;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Agregado mensal: um único UPSERT com os deltas agrupados por (usuário, mês, categoria, tipo)
+CREATE OR REPLACE FUNCTION atualizar_resumo_mensal_lote()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO resumo_mensal_categoria AS r
+            (usuario_id, ano, mes, categoria_id, tipo, soma, quantidade, soma_quadrados)
+        SELECT usuario_id,
+               EXTRACT(YEAR FROM data_transacao)::INTEGER,
+               EXTRACT(MONTH FROM data_transacao)::INTEGER,
+               categoria_id,
+               tipo,
+               SUM(valor),
+               COUNT(*),
+               SUM(valor * valor)
+        FROM novas
+        WHERE efetivada = TRUE
+        GROUP BY 1, 2, 3, 4, 5
+        ON CONFLICT (usuario_id, ano, mes, categoria_id, tipo) DO UPDATE
+        SET soma = r.soma + EXCLUDED.soma,
+            quantidade = r.quantidade + EXCLUDED.quantidade,
+            soma_quadrados = r.soma_quadrados + EXCLUDED.soma_quadrados;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        UPDATE resumo_mensal_categoria r
+        SET soma = r.soma - d.soma,
+            quantidade = r.quantidade - d.quantidade,
+            soma_quadrados = r.soma_quadrados - d.soma_quadrados
+        FROM (
+            SELECT usuario_id,
+                   EXTRACT(YEAR FROM data_transacao)::INTEGER AS ano,
+                   EXTRACT(MONTH FROM data_transacao)::INTEGER AS mes,
+                   categoria_id,
+                   tipo,
+                   SUM(valor) AS soma,
+                   COUNT(*) AS quantidade,
+                   SUM(valor * valor) AS soma_quadrados
+            FROM antigas
+            WHERE efetivada = TRUE
+            GROUP BY 1, 2, 3, 4, 5
+        ) d
+        WHERE r.usuario_id = d.usuario_id
+          AND r.ano = d.ano
+          AND r.mes = d.mes
+          AND r.categoria_id = d.categoria_id
+          AND r.tipo = d.tipo;
+    ELSE
+        INSERT INTO resumo_mensal_categoria AS r
+            (usuario_id, ano, mes, categoria_id, tipo, soma, quantidade, soma_quadrados)
+        SELECT usuario_id, ano, mes, categoria_id, tipo,
+               SUM(valor * sinal),
+               SUM(sinal),
+               SUM(valor * valor * sinal)
+        FROM (
+            SELECT usuario_id,
+                   EXTRACT(YEAR FROM data_transacao)::INTEGER AS ano,
+                   EXTRACT(MONTH FROM data_transacao)::INTEGER AS mes,
+                   categoria_id, tipo, valor, 1 AS sinal
+            FROM novas
+            WHERE efetivada = TRUE
+            UNION ALL
+            SELECT usuario_id,
+                   EXTRACT(YEAR FROM data_transacao)::INTEGER,
+                   EXTRACT(MONTH FROM data_transacao)::INTEGER,
+                   categoria_id, tipo, valor, -1
+            FROM antigas
+            WHERE efetivada = TRUE
+        ) movimentos
+        GROUP BY 1, 2, 3, 4, 5
+        HAVING SUM(sinal) <> 0 OR SUM(valor * sinal) <> 0 OR SUM(valor * valor * sinal) <> 0
+        ON CONFLICT (usuario_id, ano, mes, categoria_id, tipo) DO UPDATE
+        SET soma = r.soma + EXCLUDED.soma,
+            quantidade = r.quantidade + EXCLUDED.quantidade,
+            soma_quadrados = r.soma_quadrados + EXCLUDED.soma_quadrados;
+    END IF;
+
+    -- Só exclusões e alterações podem zerar um grupo
+    DELETE FROM resumo_mensal_categoria
+    WHERE usuario_id IN (SELECT DISTINCT usuario_id FROM antigas)
+      AND quantidade <= 0;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Troca dos triggers em uma única transação, bloqueando escritas em transacao
+BEGIN;
+LOCK TABLE transacao IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS trigger_transacao_insert_saldo ON transacao;
+DROP TRIGGER IF EXISTS trigger_transacao_update_saldo ON transacao;
+DROP TRIGGER IF EXISTS trigger_transacao_delete_saldo ON transacao;
+DROP TRIGGER IF EXISTS trigger_transacao_orcamento ON transacao;
+DROP TRIGGER IF EXISTS trigger_meta_progresso ON transacao;
+DROP TRIGGER IF EXISTS trigger_validar_categoria ON transacao;
+DROP TRIGGER IF EXISTS trigger_transacao_resumo_mensal ON transacao;
+
+CREATE TRIGGER trigger_transacao_saldo_insert
+    AFTER INSERT ON transacao
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION atualizar_saldo_conta_lote();
+
+CREATE TRIGGER trigger_transacao_saldo_update
+    AFTER UPDATE ON transacao
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION atualizar_saldo_conta_lote();
+
+CREATE TRIGGER trigger_transacao_saldo_delete
+    AFTER DELETE ON transacao
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION atualizar_saldo_conta_lote();
+
+CREATE TRIGGER trigger_transacao_orcamento_insert
+    AFTER INSERT ON transacao
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION atualizar_orcamento_gasto_lote();
+
+CREATE TRIGGER trigger_transacao_meta_insert
+    AFTER INSERT ON transacao
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION atualizar_progresso_meta_lote();
+
+CREATE TRIGGER trigger_transacao_validar_categoria_insert
+    AFTER INSERT ON transacao
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION validar_categoria_transacao_lote();
+
+CREATE TRIGGER trigger_transacao_validar_categoria_update
+    AFTER UPDATE ON transacao
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION validar_categoria_transacao_lote();
+
+CREATE TRIGGER trigger_transacao_resumo_insert
+    AFTER INSERT ON transacao
+    REFERENCING NEW TABLE AS novas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION atualizar_resumo_mensal_lote();
+
+CREATE TRIGGER trigger_transacao_resumo_update
+    AFTER UPDATE ON transacao
+    REFERENCING OLD TABLE AS antigas NEW TABLE AS novas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION atualizar_resumo_mensal_lote();
+
+CREATE TRIGGER trigger_transacao_resumo_delete
+    AFTER DELETE ON transacao
+    REFERENCING OLD TABLE AS antigas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION atualizar_resumo_mensal_lote();
+
+COMMIT;
@@ -0,0 +1,7 @@
+-- Assinatura (SHA-1 de dados, insights, recomendações e score) de cada análise gravada.
+-- A fila de persistência compara a assinatura nova com a da última análise do mesmo usuário
+-- e tipo e descarta a gravação se forem iguais; linhas antigas, sem assinatura, nunca
+-- coincidem, então a primeira análise após a migração é gravada normalmente.
+ALTER TABLE analise_consumo ADD COLUMN IF NOT EXISTS assinatura VARCHAR(40);
+
+COMMENT ON COLUMN analise_consumo.assinatura IS 'Hash do conteúdo da análise, usado para descartar gravações repetidas';
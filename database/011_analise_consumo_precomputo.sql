@@ -0,0 +1,13 @@
+-- Tipo próprio para as análises gravadas pelo pré-cálculo em lote (app.services.precomputo).
+-- Antes elas eram gravadas como 'previsao' e apareciam no histórico do usuário, intercaladas
+-- com as análises das requisições.
+ALTER TABLE analise_consumo DROP CONSTRAINT IF EXISTS analise_consumo_tipo_analise_check;
+ALTER TABLE analise_consumo DROP CONSTRAINT IF EXISTS check_tipo_analise;
+ALTER TABLE analise_consumo ADD CONSTRAINT check_tipo_analise CHECK (
+    tipo_analise IN ('padrao_consumo', 'previsao', 'anomalia', 'tendencia', 'comparativo', 'precomputo')
+);
+
+UPDATE analise_consumo
+SET tipo_analise = 'precomputo'
+WHERE tipo_analise = 'previsao'
+  AND dados_analise->>'origem' = 'precomputo';